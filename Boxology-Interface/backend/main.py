@@ -1,7 +1,18 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from pathlib import Path
-import sys, os, socket, importlib, traceback
+import sys, os, socket, importlib, hashlib, json, threading, traceback
+import asyncio
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+    from fastapi.responses import JSONResponse as DefaultResponse
 
 ROOT = Path(__file__).resolve().parents[1]
 SRC = ROOT / "src"
@@ -11,75 +22,208 @@ for p in (str(SRC), str(ROOT), str(LLM_RAG_PATH)):
     if p not in sys.path:
         sys.path.insert(0, p)
 
-def _detect_host(service_name: str = "boxology_kg") -> str:
+@lru_cache(maxsize=4)
+def _detect_host(service_name: str = "boxology_kg", timeout: float = 0.5) -> str:
     env_host = os.getenv("SPARQL_HOST")
     if env_host:
         return env_host
+    # Name resolution has no timeout of its own, so bound it with a worker thread
+    pool = ThreadPoolExecutor(max_workers=1)
     try:
-        socket.gethostbyname(service_name)
-        return service_name
-    except OSError:
+        pool.submit(socket.getaddrinfo, service_name, None,
+                    type=socket.SOCK_STREAM, flags=socket.AI_ADDRCONFIG).result(timeout=timeout)
+    except (OSError, FutureTimeout):
         return "localhost"
+    finally:
+        pool.shutdown(wait=False)
+    # Let reloaded modules (e.g. kg_creation) reuse the result without resolving again
+    os.environ["SPARQL_HOST"] = service_name
+    return service_name
 
 _kg_host = _detect_host()
 SPARQL_ENDPOINT = f"http://{_kg_host}:8890/sparql"
 SPARQL_UPDATE_ENDPOINT = f"http://{_kg_host}:8890/sparql-auth"
 print(f"[BOOT] Virtuoso host={_kg_host}")
 
-app = FastAPI()
+def _create_rag_instance():
+    """Create the KGRAG instance, or None if it cannot be initialised."""
+    try:
+        from KGRAG import KGRAG
+        rag = KGRAG()
+        print("[RAG] KGRAG instance created successfully")
+        return rag
+    except Exception as e:
+        print(f"[RAG] Error creating KGRAG instance: {e}")
+        traceback.print_exc()
+        return None
+
+class _DescribeBatcher:
+    """Coalesce concurrent node-description requests into one describe_nodes_batch call.
+
+    Requests arriving within batch_interval_ms of each other (up to
+    max_batch_size) share a single LLM prompt; duplicate labels are described once.
+    """
+
+    def __init__(self, batch_interval_ms: int = 10, max_batch_size: int = 16):
+        self.batch_interval = batch_interval_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def describe(self, rag, query: str) -> str:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((rag, query, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_interval
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch):
+        rag = batch[-1][0]
+        queries = list(dict.fromkeys(query for _, query, _ in batch))
+        try:
+            descriptions = await asyncio.to_thread(rag.describe_nodes_batch, queries)
+            by_query = dict(zip(queries, descriptions))
+            for _, query, future in batch:
+                if not future.done():
+                    future.set_result(by_query[query])
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up RAG once per worker, before the first request is accepted
+    app.state.rag = _create_rag_instance()
+    app.state.describe_batcher = _DescribeBatcher()
+    app.state.describe_batcher.start()
+    yield
+    await app.state.describe_batcher.stop()
+
+app = FastAPI(lifespan=lifespan, default_response_class=DefaultResponse)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"], allow_methods=["*"], allow_headers=["*"],
+    allow_origins=["*"], allow_methods=["GET", "POST"], allow_headers=["*"],
+    max_age=86400,  # let browsers cache the preflight for the JSON POSTs
 )
 
 # Store the current KG data in memory
 current_kg_data = None
-rag_instance = None
+current_kg_fingerprint = None  # content hash of current_kg_data
+
+def _kg_fingerprint(source: dict) -> bytes:
+    """Order-independent content hash of a boxology payload."""
+    try:
+        payload = orjson.dumps(source, option=orjson.OPT_SORT_KEYS)
+    except (AttributeError, TypeError):  # orjson missing or unsupported value
+        payload = json.dumps(source, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).digest()
 
 def _get_rag_instance():
-    """Get or create RAG instance."""
-    global rag_instance
-    if rag_instance is None:
-        try:
-            from KGRAG import KGRAG
-            rag_instance = KGRAG()
-            print("[RAG] KGRAG instance created successfully")
-        except Exception as e:
-            print(f"[RAG] Error creating KGRAG instance: {e}")
-            traceback.print_exc()
-            return None
-    return rag_instance
+    """Get the RAG instance created at startup (None if it failed)."""
+    return getattr(app.state, "rag", None)
+
+
+KG_MODULE_NAME = "kg_creation.kg_creation"
+KG_MODULE_FILE = SRC / "kg_creation" / "kg_creation.py"
+_KG_MODULE = None
+_KG_MTIME = 0.0
 
+def _cached_import(module_name: str):
+    """Return an already-imported module, importing it only if missing."""
+    module = sys.modules.get(module_name)
+    if module is None:
+        module = importlib.import_module(module_name)
+    return module
 
 def _fresh_kg_module():
-    # Drop any cached kg_creation modules
-    for name in list(sys.modules.keys()):
-        if name.startswith("kg_creation"):
-            del sys.modules[name]
-    import kg_creation.kg_creation as kg_module
-    importlib.reload(kg_module)  # ensure fresh code + globals
-    return kg_module
+    """Return kg_creation, re-importing it only when its source changed."""
+    global _KG_MODULE, _KG_MTIME
+    try:
+        mtime = KG_MODULE_FILE.stat().st_mtime
+    except OSError:
+        mtime = _KG_MTIME
+    if _KG_MODULE is not None and mtime == _KG_MTIME:
+        return _KG_MODULE
+    if _KG_MODULE is not None:
+        # Source edited since last import: drop stale kg_creation modules
+        for name in list(sys.modules.keys()):
+            if name.startswith("kg_creation"):
+                del sys.modules[name]
+    _KG_MODULE = _cached_import(KG_MODULE_NAME)
+    _KG_MTIME = mtime
+    return _KG_MODULE
+
+_KG_LOCK = threading.Lock()
+
+def _create_kg(source: dict):
+    # The rdfizer accumulates per-run state in module globals, so runs must not overlap
+    with _KG_LOCK:
+        return _fresh_kg_module().create_kg(source)
+
+async def _read_json_object(request: Request) -> dict:
+    """Parse a (potentially large) JSON object body with orjson when available."""
+    body = await request.body()
+    try:
+        data = orjson.loads(body) if orjson is not None else json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=422, detail="Request body must be a JSON object")
+    return data
 
 @app.post("/api/kg")
-async def api_create_kg(source: dict):
-    global current_kg_data
+async def api_create_kg(request: Request):
+    global current_kg_data, current_kg_fingerprint
+    source = await _read_json_object(request)
     try:
         ids = [b.get("id") for b in source.get("boxologies", [])]
         print(f"[API] incoming boxologies={ids}")
-        kg_module = _fresh_kg_module()
-        result = kg_module.create_kg(source)
+        fingerprint = _kg_fingerprint(source)
+        result = await asyncio.to_thread(_create_kg, source)
         if not isinstance(result, dict):
             result = {"mode": "unknown"}
         
-        # Store the current KG data
-        current_kg_data = source
+        # Store the current KG data. On an identical re-POST keep the object
+        # already stored, so RAG (which holds that object) needs no reload.
+        unchanged = current_kg_data is not None and fingerprint == current_kg_fingerprint
+        if not unchanged:
+            current_kg_data = source
+            current_kg_fingerprint = fingerprint
         print(f"[API] Stored KG data with {len(source.get('boxologies', []))} boxologies")
         
         # Load KG data into RAG system
         try:
             rag = _get_rag_instance()
-            if rag is not None:
-                rag.load_json_data(source)
+            if rag is not None and rag.current_kg_data is current_kg_data:
+                print("[API] KG data unchanged; RAG already up to date")
+            elif rag is not None:
+                await asyncio.to_thread(rag.load_json_data, current_kg_data)
                 print(f"[API] KG data loaded into RAG system with {len(rag.current_json_nodes)} nodes")
         except Exception as e:
             print(f"[API] Warning: Could not load KG into RAG: {e}")
@@ -103,7 +247,7 @@ async def get_current_kg():
 
 @app.post("/api/kg/node-description")
 async def get_node_description(node_data: dict):
-    """Get LLM description for a specific node"""
+    """Get LLM description for a specific node (batched with concurrent requests)"""
     global current_kg_data
     
     if current_kg_data is None:
@@ -123,14 +267,15 @@ async def get_node_description(node_data: dict):
                 "description": "⚠️ RAG system not available. Check backend logs for initialization errors."
             }
         
-        # Load current KG data into RAG if needed
-        if not rag.current_json_nodes or rag.current_kg_data != current_kg_data:
+        # Load current KG data into RAG if needed. current_kg_data is only ever
+        # rebound (never mutated), so identity is enough to detect a new KG.
+        if not rag.current_json_nodes or rag.current_kg_data is not current_kg_data:
             print("[API] Loading current KG data into RAG...")
-            rag.load_json_data(current_kg_data)
+            await asyncio.to_thread(rag.load_json_data, current_kg_data)
             print(f"[API] RAG now has {len(rag.current_json_nodes)} nodes loaded")
         
-        # Get description from RAG
-        description = rag.describe_node(node_label or node_id)
+        # Get description from RAG, sharing one LLM call with concurrent requests
+        description = await app.state.describe_batcher.describe(rag, node_label or node_id)
         
         return {
             "status": "ok",
@@ -8,16 +8,30 @@
 
 from __future__ import annotations
 
+import hashlib
+import io
+import itertools
 import json
 import os
 import pathlib
 import re
-import xml.etree.ElementTree as ET
-from typing import Dict, List, Set, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, FrozenSet, List, Tuple
 
-import requests
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+# requests, xml.etree and scikit-learn are imported on first use so that
+# importing this module (e.g. via the backend's sys.path) stays cheap.
+
+try:
+    import ahocorasick  # Optional (pyahocorasick): single-pass multi-term matching
+except ImportError:
+    ahocorasick = None
+
+try:
+    import orjson  # Optional: faster JSON parsing of Boxology files
+except ImportError:
+    orjson = None
 
 # -------------------- Config --------------------
 
@@ -25,8 +39,11 @@ ARXIV_API_URL = "http://export.arxiv.org/api/query"
 PAPERS_PER_DOMAIN = 5
 SORT_BY = "submittedDate"  # Also used: citationCount
 SORT_METHODS = ["submittedDate", "citationCount"]  # Fetch from both
+ARXIV_MAX_WORKERS = 4  # Concurrent arXiv requests (keep low to respect rate limits)
 OUTPUT_DIR = pathlib.Path(__file__).parent / "dataset"
 OUTPUT_GLOSSARY = OUTPUT_DIR / "glossary.txt"
+ARXIV_CACHE_DIR = OUTPUT_DIR / ".arxiv_cache"
+ARXIV_CACHE_TTL = int(os.getenv("ARXIV_CACHE_TTL", str(24 * 3600)))  # seconds; 0 disables
 
 # Your test domains (override LLM while testing)
 PREDICTED_DOMAINS: List[str] = [
@@ -42,17 +59,64 @@ PREDICTED_DOMAINS: List[str] = [
 ]
 
 # Structural/low-signal words to ignore
-STOPWORDS: Set[str] = {
+STOPWORDS: FrozenSet[str] = frozenset({
     "a","an","the","of","to","and","or","for","in","on","by","with","from",
     "data","number","symbol","semanticmodel","statisticalmodel","rules","process",
     "input","output","model","models","raw","cleaned","numeric","semantic","support",
     "actor","engineer","generate","train","deduce","transform","embed","artifacts"
-}
+})
+
+# Precompiled patterns used in the per-label/per-sentence loops
+_WS_RE = re.compile(r"\s+")
+_TOKEN_RE = re.compile(r"[^A-Za-z0-9\+\-]+")
+_SENT_RE = re.compile(r"[.!?]+")
 
 # LLM (Ollama only)
 OLLAMA_API_URL = os.getenv("OLLAMA_API_URL", "http://localhost:11434/api/generate")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:3b-instruct")
 
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+_ET = None
+_HV = None
+
+def _get_session():
+    """Shared keep-alive session for arXiv and Ollama calls (built on first use)."""
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16,
+                                      max_retries=Retry(total=3, backoff_factor=0.3))
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update({"User-Agent": os.getenv("USER_AGENT", "Boxology-Glossary/1.0")})
+                _SESSION = session
+    return _SESSION
+
+def _get_etree():
+    global _ET
+    if _ET is None:
+        import xml.etree.ElementTree as ET
+        _ET = ET
+    return _ET
+
+def _get_vectorizer():
+    """Stateless hashed term-frequency vectorizer, shared across calls.
+
+    Rows are L2-normalised, so cosine similarity is a plain sparse dot product.
+    """
+    global _HV
+    if _HV is None:
+        from sklearn.feature_extraction.text import HashingVectorizer
+        _HV = HashingVectorizer(n_features=2**17, alternate_sign=False, stop_words="english", norm="l2")
+    return _HV
+
 def _extract_json_block(text: str) -> str | None:
     i, j = text.find("{"), text.rfind("}")
     if i != -1 and j != -1 and j > i:
@@ -70,7 +134,7 @@ def gen_search_queries_ollama(keywords: List[str]) -> List[str]:
     )
     payload = {"model": OLLAMA_MODEL, "prompt": prompt, "stream": False, "options": {"temperature": 0.3, "num_predict": 400}}
     try:
-        r = requests.post(OLLAMA_API_URL, json=payload, timeout=30)
+        r = _get_session().post(OLLAMA_API_URL, json=payload, timeout=30)
         r.raise_for_status()
         resp = r.json().get("response", "")
         jb = _extract_json_block(resp) or "{}"
@@ -84,26 +148,53 @@ def gen_search_queries_ollama(keywords: List[str]) -> List[str]:
     base = [k for k in keywords if len(k) > 3][:6]
     return [f'"{b}" AND (fuzzy OR clustering OR modeling)' for b in base]
 
+def _paper_text(p: Dict[str, str]) -> str:
+    return f"{p.get('title','')} {p.get('summary','')}".strip()
+
+def _top_by_score(papers: List[Dict[str, str]], scores, top_k: int) -> List[Dict[str, str]]:
+    ranked = sorted(zip(scores.tolist(), papers), key=lambda x: x[0], reverse=True)
+    return [p for _, p in ranked[:top_k]]
+
 def tfidf_rank(papers: List[Dict[str, str]], queries: List[str], top_k: int = 5) -> List[Dict[str, str]]:
-    """Rank papers by cosine similarity between TF‑IDF of queries and paper texts."""
+    """Rank papers by cosine similarity between hashed term vectors of queries and paper texts."""
     if not papers:
         return []
-    docs = [f"{p.get('title','')} {p.get('summary','')}".strip() for p in papers]
-    corpus = queries + docs
-    vec = TfidfVectorizer(stop_words="english", max_features=20000)
-    X = vec.fit_transform(corpus)
-    Q = X[:len(queries)]
-    D = X[len(queries):]
-    sims = cosine_similarity(Q, D)  # shape: (num_queries, num_docs)
+    # Stream the corpus; the vectorizer is stateless, so no docs list is needed
+    n_queries = len(queries)
+    X = _get_vectorizer().transform(itertools.chain(queries, map(_paper_text, papers)))
+    Q = X[:n_queries]
+    D = X[n_queries:]
+    sims = (Q @ D.T).toarray()  # shape: (num_queries, num_docs)
     scores = sims.max(axis=0)  # best-match per doc
-    ranked = sorted(zip(scores.tolist(), papers), key=lambda x: x[0], reverse=True)
-    return [p for _, p in ranked[:top_k]]
+    return _top_by_score(papers, scores, top_k)
 
 def select_top_papers(domain_papers: Dict[str, List[Dict[str, str]]], queries: List[str], top_k: int = 5) -> Dict[str, List[Dict[str, str]]]:
-    """Apply TF‑IDF ranking per domain and keep top_k."""
+    """Apply similarity ranking per domain and keep top_k.
+
+    The queries and every domain's papers are vectorised in one call;
+    each domain then ranks its own row slice of that matrix.
+    """
+    spans: Dict[str, Tuple[int, int]] = {}
+    n_docs = 0
+    for domain, papers in domain_papers.items():
+        spans[domain] = (n_docs, n_docs + len(papers))
+        n_docs += len(papers)
+    if not n_docs:
+        return {domain: [] for domain in domain_papers}
+
+    docs = (_paper_text(p) for papers in domain_papers.values() for p in papers)
+    X = _get_vectorizer().transform(itertools.chain(queries, docs))
+    n_queries = len(queries)
+    Q = X[:n_queries]
+
     out: Dict[str, List[Dict[str, str]]] = {}
     for domain, papers in domain_papers.items():
-        out[domain] = tfidf_rank(papers, queries, top_k=top_k)
+        start, end = spans[domain]
+        if start == end:
+            out[domain] = []
+            continue
+        sims = (Q @ X[n_queries + start:n_queries + end].T).toarray()
+        out[domain] = _top_by_score(papers, sims.max(axis=0), top_k)
     return out
 
 # -------------------- Label ingestion and keywording --------------------
@@ -111,51 +202,62 @@ def select_top_papers(domain_papers: Dict[str, List[Dict[str, str]]], queries: L
 def load_labels(data_dir: pathlib.Path) -> List[str]:
     """Collect all 'label' strings from any Boxology JSON (handles dict or list roots)."""
 
-    def collect(node, acc: List[str]) -> None:
-        if isinstance(node, dict):
-            v = node.get("label")
-            if isinstance(v, str) and v.strip():
-                acc.append(v.strip())
-            for child in node.values():
-                collect(child, acc)
-        elif isinstance(node, list):
-            for item in node:
-                collect(item, acc)
+    def collect(root, acc: List[str]) -> None:
+        # Explicit stack, children pushed reversed to keep document (pre-)order
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                v = node.get("label")
+                if isinstance(v, str):
+                    v = v.strip()
+                    if v:
+                        acc.append(v)
+                stack.extend(reversed(list(node.values())))
+            elif isinstance(node, list):
+                stack.extend(reversed(node))
 
     labels: List[str] = []
     for p in data_dir.glob("*.json"):
         try:
-            obj = json.loads(p.read_text(encoding="utf-8"))
+            if orjson is not None:
+                obj = orjson.loads(p.read_bytes())
+            else:
+                obj = json.loads(p.read_text(encoding="utf-8"))
         except Exception:
             continue
         collect(obj, labels)
 
     # dedupe preserving order
-    seen, out = set(), []
-    for l in labels:
-        if l not in seen:
-            seen.add(l)
-            out.append(l)
-    return out
+    return list(dict.fromkeys(labels))
 
 def extract_keywords(labels: List[str], max_keywords: int = 60) -> List[str]:
-    phrases = [re.sub(r"\s+", " ", l.strip()) for l in labels if isinstance(l, str) and l.strip()]
-    tokens: List[str] = []
-    for l in phrases:
-        for tok in re.split(r"[^A-Za-z0-9\+\-]+", l):
-            t = tok.strip()
-            if len(t) >= 3 and t.lower() not in STOPWORDS:
-                tokens.append(t)
-    bigrams: List[str] = []
-    for l in phrases:
-        ws = [w for w in re.split(r"[^A-Za-z0-9\+\-]+", l) if len(w) >= 3]
-        for i in range(len(ws) - 1):
-            if ws[i].lower() in STOPWORDS or ws[i+1].lower() in STOPWORDS:
-                continue
-            bigrams.append(f"{ws[i]} {ws[i+1]}")
-    candidates = phrases + bigrams + tokens
+    phrases = [_WS_RE.sub(" ", l.strip()) for l in labels if isinstance(l, str) and l.strip()]
+
+    def split_lower(l: str) -> List[Tuple[str, str]]:
+        # Lower once per phrase; only safe for ASCII, where lower() keeps token boundaries
+        if l.isascii():
+            return list(zip(_TOKEN_RE.split(l), _TOKEN_RE.split(l.lower())))
+        return [(w, w.lower()) for w in _TOKEN_RE.split(l)]
+
+    # Bigrams and tokens are generated lazily, so nothing past max_keywords is built
+    def bigrams():
+        for l in phrases:
+            ws = [(w, lw) for w, lw in split_lower(l) if len(w) >= 3]
+            for (w1, l1), (w2, l2) in zip(ws, ws[1:]):
+                if l1 in STOPWORDS or l2 in STOPWORDS:
+                    continue
+                yield f"{w1} {w2}"
+
+    def tokens():
+        for l in phrases:
+            for tok, low in split_lower(l):
+                t = tok.strip()
+                if len(t) >= 3 and low.strip() not in STOPWORDS:
+                    yield t
+
     seen, out = set(), []
-    for c in candidates:
+    for c in itertools.chain(phrases, bigrams(), tokens()):
         key = c.lower()
         if key and key not in seen:
             seen.add(key)
@@ -178,30 +280,78 @@ def build_query(domain: str, domain_terms: List[str], combined_terms: List[str])
     terms_clause = " OR ".join(pool) if pool else f'all:"{domain}"'
     return f"({terms_clause}) AND all:\"{domain}\""
 
-def fetch_arxiv(query: str, max_results: int, sort_by: str = "submittedDate") -> str:
+def _arxiv_cache_paths(query: str, max_results: int, sort_by: str) -> Tuple[pathlib.Path, pathlib.Path]:
+    key = hashlib.sha1(json.dumps([query, sort_by, max_results]).encode("utf-8")).hexdigest()
+    return ARXIV_CACHE_DIR / f"{key}.xml", ARXIV_CACHE_DIR / f"{key}.meta.json"
+
+def _read_arxiv_cache(query: str, max_results: int, sort_by: str) -> bytes | None:
+    if ARXIV_CACHE_TTL <= 0:
+        return None
+    xml_path, meta_path = _arxiv_cache_paths(query, max_results, sort_by)
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if time.time() - float(meta.get("timestamp", 0)) >= ARXIV_CACHE_TTL:
+            return None
+        return xml_path.read_bytes()
+    except (OSError, ValueError):
+        return None
+
+def _write_arxiv_cache(query: str, max_results: int, sort_by: str, xml_data: bytes) -> None:
+    if ARXIV_CACHE_TTL <= 0:
+        return
+    xml_path, meta_path = _arxiv_cache_paths(query, max_results, sort_by)
+    try:
+        ARXIV_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        xml_path.write_bytes(xml_data)
+        meta = {"timestamp": time.time(), "query": query, "sort_by": sort_by, "max_results": max_results}
+        meta_path.write_text(json.dumps(meta), encoding="utf-8")
+    except OSError as e:
+        print(f"  ✗ Could not write arXiv cache: {e}")
+
+def fetch_arxiv(query: str, max_results: int, sort_by: str = "submittedDate") -> bytes:
+    """Return the raw Atom response; the parser decodes it, so skip r.text."""
+    cached = _read_arxiv_cache(query, max_results, sort_by)
+    if cached is not None:
+        return cached
     params = {"search_query": query, "max_results": max_results, "sortBy": sort_by}
-    headers = {"User-Agent": os.getenv("USER_AGENT", "Boxology-Glossary/1.0")}
-    r = requests.get(ARXIV_API_URL, params=params, headers=headers, timeout=30)
+    r = _get_session().get(ARXIV_API_URL, params=params, timeout=30)
     r.raise_for_status()
-    return r.text
+    _write_arxiv_cache(query, max_results, sort_by, r.content)
+    return r.content
 
-def parse_arxiv(xml_text: str) -> List[Dict[str, str]]:
-    ns = {"atom": "http://www.w3.org/2005/Atom"}
-    root = ET.fromstring(xml_text)
+_ATOM = "{http://www.w3.org/2005/Atom}"
+
+def parse_arxiv(xml_data: bytes | str) -> List[Dict[str, str]]:
+    """Stream <entry> elements and keep only title/summary, clearing each as we go."""
+    if isinstance(xml_data, str):
+        xml_data = xml_data.encode("utf-8")
     papers: List[Dict[str, str]] = []
-    for entry in root.findall("atom:entry", ns):
-        title = (entry.findtext("atom:title", default="", namespaces=ns) or "").strip()
-        summary = (entry.findtext("atom:summary", default="", namespaces=ns) or "").strip()
+    for _, elem in _get_etree().iterparse(io.BytesIO(xml_data), events=("end",)):
+        if elem.tag != _ATOM + "entry":
+            continue
+        title = (elem.findtext(_ATOM + "title", default="") or "").strip()
+        summary = (elem.findtext(_ATOM + "summary", default="") or "").strip()
         title = " ".join(title.split())
         summary = " ".join(summary.split())
         if title or summary:
             papers.append({"title": title, "summary": summary})
+        elem.clear()
     return papers
 
 # -------------------- Term extraction and glossary --------------------
 
 def extract_sentences(text: str) -> List[str]:
-    return [s.strip() for s in re.split(r"[.!?]+", text) if len(s.strip()) > 20]
+    return [s.strip() for s in _SENT_RE.split(text) if len(s.strip()) > 20]
+
+def _build_term_automaton(terms: List[str]):
+    """Aho–Corasick automaton over terms, or None if pyahocorasick is unavailable."""
+    if ahocorasick is None or not terms:
+        return None
+    automaton = ahocorasick.Automaton()
+    for t in terms:
+        automaton.add_word(t, t)
+    automaton.make_automaton()
+    return automaton
 
 def extract_definitions(papers: List[Dict[str, str]], candidates: List[str]) -> Dict[str, str]:
     defs: Dict[str, str] = {}
@@ -213,6 +363,7 @@ def extract_definitions(papers: List[Dict[str, str]], candidates: List[str]) ->
             seen.add(t2)
             cand.append(t2)
     cand.sort(key=lambda x: (-1 if " " in x else 0, -len(x)))  # prefer multiword
+    automaton = _build_term_automaton(cand)
 
     for paper in papers:
         title = paper.get("title", "")
@@ -220,16 +371,28 @@ def extract_definitions(papers: List[Dict[str, str]], candidates: List[str]) ->
         sentences = extract_sentences(summary)
         if not sentences:
             continue
+        # Lower everything once per paper, not once per candidate term
+        pairs = [(s.strip(), s.lower()) for s in sentences]
+        txt_low = f"{title}. {summary}".lower()
+        if automaton is not None:
+            # One scan per sentence finds every candidate term it contains
+            for s, sl in pairs:
+                for _, term in automaton.iter(sl):
+                    if term not in defs:
+                        defs[term] = s
+            for _, term in automaton.iter(txt_low):
+                if term not in defs:
+                    defs[term] = sentences[0]
+            continue
         for term in cand:
             if term in defs:
                 continue
-            for s in sentences:
-                if term in s.lower():
-                    defs[term] = s.strip()
+            for s, sl in pairs:
+                if term in sl:
+                    defs[term] = s
                     break
-            if term not in defs:
-                txt = f"{title}. {summary}".lower()
-                if term in txt and sentences:
+            else:
+                if term in txt_low:
                     defs[term] = sentences[0]
     return defs
 
@@ -289,21 +452,29 @@ def main() -> None:
     queries = gen_search_queries_ollama(keywords)
     print(f"✓ Generated {len(queries)} search queries")
 
-    # Fetch papers from multiple sort methods (recent + most cited)
+    # Fetch papers from multiple sort methods (recent + most cited).
+    # All (domain, sort) requests are independent, so dispatch them together.
+    domain_queries = {d: build_query(d, terms_by_domain.get(d, []), combined) for d in domains}
+    print(f"\nFetching {PAPERS_PER_DOMAIN} papers per sort method for {len(domain_queries)} domains...")
+    with ThreadPoolExecutor(max_workers=ARXIV_MAX_WORKERS) as pool:
+        pending = {
+            (domain, sort_method): pool.submit(fetch_arxiv, query, PAPERS_PER_DOMAIN, sort_method)
+            for domain, query in domain_queries.items()
+            for sort_method in SORT_METHODS
+        }
+
     domain_papers: Dict[str, List[Dict[str, str]]] = {}
-    for domain in domains:
-        query = build_query(domain, terms_by_domain.get(domain, []), combined)
+    for domain, query in domain_queries.items():
         print(f"\nFetching papers for: {domain}")
         print(f"Query: {query}")
         all_papers: List[Dict[str, str]] = []
         
         for sort_method in SORT_METHODS:
             try:
-                print(f"  Fetching {PAPERS_PER_DOMAIN} papers (sorted by {sort_method})...")
-                xml = fetch_arxiv(query, PAPERS_PER_DOMAIN, sort_by=sort_method)
+                xml = pending[(domain, sort_method)].result()
                 papers = parse_arxiv(xml)
                 all_papers.extend(papers)
-                print(f"  ✓ Found {len(papers)} papers")
+                print(f"  ✓ Found {len(papers)} papers (sorted by {sort_method})")
             except Exception as e:
                 print(f"  ✗ Error fetching with {sort_method}: {e}")
         
@@ -319,7 +490,7 @@ def main() -> None:
         domain_papers[domain] = unique_papers
         print(f"✓ Total unique papers for {domain}: {len(unique_papers)}")
 
-    # Rank papers per domain using TF‑IDF (embedding-like retrieval)
+    # Rank papers per domain using hashed term vectors (embedding-like retrieval)
     domain_papers = select_top_papers(domain_papers, queries, top_k=5)
 
     glossary = build_glossary(domain_papers, terms_by_domain, combined)
@@ -15,27 +15,44 @@ Enhanced for Tool4Boxology KG with:
 
 from __future__ import annotations
 
+import contextlib
+import multiprocessing
+import os
 import pathlib
 import re
 import random
-from typing import Dict, List, Set, Tuple, Optional
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Tuple, Optional
 from collections import defaultdict
 
 import numpy as np
 
+try:
+    from numba import njit, prange  # Optional: compiled, multi-threaded TransE batch step
+except ImportError:
+    njit = None
+
 
 # Get the absolute path relative to this file's location
 SCRIPT_DIR = pathlib.Path(__file__).parent.resolve()
 KG_FILE = SCRIPT_DIR / "dataset" / "Tool4BoxologyKG.nt"
 EMBEDDING_DIM = 100  # Optimized for smaller KG
 LEARNING_RATE = 0.001  # Reduced for stable convergence
-MARGIN = 1.0  # Reduced margin for better convergence
+MARGIN = 1.0  # Reduced margin for better convergence (in squared-L2 score units)
 NUM_EPOCHS = 500
 BATCH_SIZE = 256  # Larger batches for stable gradients
 NEGATIVE_SAMPLES = 5  # Reduced negative samples
 PATIENCE = 30  # Early stopping patience
 VALIDATION_SPLIT = 0.1
 L2_LAMBDA = 0.0001  # L2 regularization
+SHARED_NEGATIVES = True  # contrast each chunk of positives with one shared pool of negatives
+NEG_CHUNK_SIZE = 64  # positives per shared negative pool
+NEG_POOL_SIZE = 64  # negative entities per pool
+TRAIN_BACKEND = os.getenv("TRANSE_BACKEND", "numpy")  # "numpy" or "torch" (GPU when available)
+TRAIN_WORKERS = int(os.getenv("TRANSE_WORKERS", "1"))  # >1: Hogwild-style processes over shared embeddings
+TORCH_NORMALIZE_EVERY = 10  # torch backend: project entities to the unit ball every N steps
+OUTPUT_DTYPE = np.float16  # half precision on disk; loaders upcast to float32
+SAVE_FULL_PRECISION = False  # also write *_fp32.npy copies alongside the float16 files
 OUTPUT_ENTITY_EMBEDDINGS = SCRIPT_DIR / "entity_embeddings.npy"
 OUTPUT_RELATION_EMBEDDINGS = SCRIPT_DIR / "relation_embeddings.npy"
 OUTPUT_ENTITY_MAP = SCRIPT_DIR / "entity_map.txt"
@@ -70,6 +87,12 @@ ENTITY_TYPE_IMPORTANCE = {
     "Unknown": 1.0,
 }
 
+# Cheap substring pre-filter: a kept triple must mention one of these predicates
+_KEEP_SUBSTR = tuple(f"<{p}>".encode("utf-8") for p in KEEP_PREDICATES)
+
+# N-Triples line: <subject> <predicate> (<object> | "literal")
+_NT_RE = re.compile(r'<([^>]+)>\s+<([^>]+)>\s+(?:<([^>]+)>|"([^"]+)")')
+
 
 def is_literal(obj: str) -> bool:
     """Check if object is a literal value."""
@@ -82,17 +105,12 @@ def parse_nt_line(line: str) -> Tuple[str, str, str] | None:
     if not line or line.startswith("#"):
         return None
     
-    # N-Triples format: <subject> <predicate> <object> .
-    pattern = r'<([^>]+)>\s+<([^>]+)>\s+<([^>]+)>|<([^>]+)>\s+<([^>]+)>\s+"([^"]+)"'
-    match = re.match(pattern, line)
-    
-    if match:
-        if match.group(1):  # URI-URI-URI triple
-            return (match.group(1), match.group(2), match.group(3))
-        elif match.group(4):  # URI-URI-Literal triple
-            return (match.group(4), match.group(5), f'"{match.group(6)}"')
-    
-    return None
+    match = _NT_RE.match(line)
+    if not match:
+        return None
+    subj, pred, obj, literal = match.groups()
+    # URI-URI-URI triple, or URI-URI-Literal triple
+    return (subj, pred, obj) if obj else (subj, pred, f'"{literal}"')
 
 
 def extract_label_from_uri(uri: str) -> str:
@@ -128,11 +146,13 @@ def extract_relation_type(predicate: str) -> str:
 
 
 def load_kg_triples(kg_file: pathlib.Path) -> Tuple[
-    List[Tuple[str, str, str]], 
+    List[Tuple[int, int, int]], 
     Dict[str, int], 
     Dict[str, int],
     Dict[str, str],
-    Dict[str, str]
+    Dict[str, str],
+    List[str],
+    List[str]
 ]:
     """Load KG triples and create entity/relation mappings with type information.
     
@@ -147,15 +167,21 @@ def load_kg_triples(kg_file: pathlib.Path) -> Tuple[
     triples = []
     entities = set()
     relations = set()
-    entity_types = {}
-    relation_types = {}
     
     filtered_count = 0
     kept_count = 0
     
-    with kg_file.open("r", encoding="utf-8") as f:
-        for line_num, line in enumerate(f, 1):
-            triple = parse_nt_line(line)
+    line_num = 0
+    # Read raw bytes; only lines that pass the pre-filter get decoded
+    with kg_file.open("rb") as f:
+        for line_num, raw in enumerate(f, 1):
+            # Most lines are labels/types; skip them before running the regex
+            if not any(p in raw for p in _KEEP_SUBSTR):
+                if raw.strip() and not raw.lstrip().startswith(b"#"):
+                    filtered_count += 1
+                continue
+            
+            triple = parse_nt_line(raw.decode("utf-8"))
             if not triple:
                 continue
             
@@ -171,8 +197,8 @@ def load_kg_triples(kg_file: pathlib.Path) -> Tuple[
                 filtered_count += 1
                 continue
             
-            # Filter out literal objects
-            if is_literal(obj):
+            # Filter out literal objects (parse_nt_line keeps them quoted)
+            if obj[0] == '"':
                 filtered_count += 1
                 continue
             
@@ -187,26 +213,22 @@ def load_kg_triples(kg_file: pathlib.Path) -> Tuple[
             entities.add(obj)
             relations.add(pred)
             kept_count += 1
-            
-            # Store entity types
-            entity_types[subj] = extract_entity_type(subj)
-            entity_types[obj] = extract_entity_type(obj)
-            
-            # Store relation types
-            relation_types[pred] = extract_relation_type(pred)
-            
-            if line_num % 1000 == 0:
-                print(f"Processed {line_num} lines... (kept: {kept_count}, filtered: {filtered_count})")
     
     print(f"\nFiltering Summary:")
     print(f"  Total lines processed: {line_num}")
     print(f"  Triples kept: {kept_count}")
     print(f"  Triples filtered: {filtered_count}")
-    print(f"  Filter rate: {filtered_count/(kept_count+filtered_count)*100:.1f}%")
+    print(f"  Filter rate: {filtered_count/max(kept_count+filtered_count, 1)*100:.1f}%")
+    
+    # Create index mappings; the sorted lists double as the idx -> URI lookup
+    entities_sorted = sorted(entities)
+    relations_sorted = sorted(relations)
+    entity_to_idx = {entity: idx for idx, entity in enumerate(entities_sorted)}
+    relation_to_idx = {relation: idx for idx, relation in enumerate(relations_sorted)}
     
-    # Create index mappings
-    entity_to_idx = {entity: idx for idx, entity in enumerate(sorted(entities))}
-    relation_to_idx = {relation: idx for idx, relation in enumerate(sorted(relations))}
+    # Store entity and relation types, once per unique URI
+    entity_types = {entity: extract_entity_type(entity) for entity in entities_sorted}
+    relation_types = {relation: extract_relation_type(relation) for relation in relations_sorted}
     
     # Convert triples to indices
     indexed_triples = [
@@ -214,7 +236,8 @@ def load_kg_triples(kg_file: pathlib.Path) -> Tuple[
         for s, p, o in triples
     ]
     
-    return indexed_triples, entity_to_idx, relation_to_idx, entity_types, relation_types
+    return (indexed_triples, entity_to_idx, relation_to_idx, entity_types, relation_types,
+            entities_sorted, relations_sorted)
 
 
 def split_train_validation(
@@ -241,74 +264,58 @@ def initialize_embeddings_enhanced(
     entity_bound = np.sqrt(6.0 / (num_entities + dim))
     relation_bound = np.sqrt(6.0 / (num_relations + dim))
     
-    entity_embeddings = np.random.uniform(-entity_bound, entity_bound, (num_entities, dim))
-    relation_embeddings = np.random.uniform(-relation_bound, relation_bound, (num_relations, dim))
+    # Generated directly as float32 and scaled in place (no float64 copy)
+    rng = np.random.default_rng()
+    entity_embeddings = rng.random((num_entities, dim), dtype=np.float32)
+    entity_embeddings *= 2 * entity_bound
+    entity_embeddings -= entity_bound
+    relation_embeddings = rng.random((num_relations, dim), dtype=np.float32)
+    relation_embeddings *= 2 * relation_bound
+    relation_embeddings -= relation_bound
     
     # Apply type-aware scaling to entity embeddings
-    idx_to_entity = {idx: entity for entity, idx in entity_to_idx.items()}
-    for idx in range(num_entities):
-        entity = idx_to_entity[idx]
+    entity_importance = np.ones(num_entities, dtype=np.float32)
+    for entity, idx in entity_to_idx.items():
         entity_type = entity_types.get(entity, "Unknown")
-        importance = ENTITY_TYPE_IMPORTANCE.get(entity_type, 1.0)
-        entity_embeddings[idx] *= importance
+        entity_importance[idx] = ENTITY_TYPE_IMPORTANCE.get(entity_type, 1.0)
+    entity_embeddings *= entity_importance[:, None]
     
     # Apply relation-type scaling
-    idx_to_relation = {idx: relation for relation, idx in relation_to_idx.items()}
-    for idx in range(num_relations):
-        relation = idx_to_relation[idx]
+    relation_scale = np.ones(num_relations, dtype=np.float32)
+    for relation, idx in relation_to_idx.items():
         rel_type = relation_types.get(relation, "other")
-        weight = RELATION_WEIGHTS.get(rel_type, 1.0)
-        relation_embeddings[idx] *= weight
+        relation_scale[idx] = RELATION_WEIGHTS.get(rel_type, 1.0)
+    relation_embeddings *= relation_scale[:, None]
     
     # Normalize entity embeddings
-    entity_embeddings = entity_embeddings / (np.linalg.norm(entity_embeddings, axis=1, keepdims=True) + 1e-10)
+    entity_embeddings /= row_norms(entity_embeddings)[:, None] + 1e-10
     
-    return entity_embeddings.astype(np.float32), relation_embeddings.astype(np.float32)
-
-
-def generate_negative_sample(
-    triple: Tuple[int, int, int],
-    num_entities: int,
-    entity_set: Set[Tuple[int, int, int]],
-    max_attempts: int = 100
-) -> Tuple[int, int, int]:
-    """Generate a negative sample by corrupting head or tail entity."""
-    h, r, t = triple
-    
-    for _ in range(max_attempts):
-        # Randomly corrupt head or tail
-        if random.random() < 0.5:
-            h_neg = random.randint(0, num_entities - 1)
-            neg_triple = (h_neg, r, t)
-        else:
-            t_neg = random.randint(0, num_entities - 1)
-            neg_triple = (h, r, t_neg)
-        
-        if neg_triple not in entity_set:
-            return neg_triple
-    
-    # Fallback: return any corruption
-    if random.random() < 0.5:
-        return (random.randint(0, num_entities - 1), r, t)
-    else:
-        return (h, r, random.randint(0, num_entities - 1))
+    return entity_embeddings, relation_embeddings
 
 
 def compute_score(h_emb: np.ndarray, r_emb: np.ndarray, t_emb: np.ndarray, norm: str = 'L2') -> float:
-    """Compute TransE score with different norms."""
+    """Compute TransE score with different norms ('L2' is the squared distance used in training)."""
     diff = h_emb + r_emb - t_emb
     if norm == 'L1':
         return np.sum(np.abs(diff))
-    elif norm == 'L2':
-        return np.linalg.norm(diff)
-    return np.linalg.norm(diff)
+    return float(diff @ diff)
+
+
+def row_sq_norms(x: np.ndarray) -> np.ndarray:
+    """Squared L2 norm over the last axis (einsum; skips np.linalg.norm dispatch)."""
+    return np.einsum("...i,...i->...", x, x)
+
+
+def row_norms(x: np.ndarray) -> np.ndarray:
+    """L2 norm over the last axis."""
+    return np.sqrt(row_sq_norms(x))
 
 
 def evaluate_model_margin(
     triples: List[Tuple[int, int, int]],
     entity_embeddings: np.ndarray,
     relation_embeddings: np.ndarray,
-    relation_importance: Dict[int, float],
+    relation_importance: np.ndarray,
     num_entities: int,
     neg_samples: int = 3,
     margin: float = 1.0
@@ -317,44 +324,499 @@ def evaluate_model_margin(
     
     This matches the training loss computation for better validation.
     """
-    triple_set = set(triples)
-    total_loss = 0.0
-    count = 0
+    if not triples:
+        return 0.0
+    arr = np.asarray(triples, dtype=np.int32).reshape(-1, 3)
+    h, r, t = arr[:, 0], arr[:, 1], arr[:, 2]
+    
+    # Positive scores, shape (N, 1)
+    pos_score = row_sq_norms(
+        entity_embeddings[h] + relation_embeddings[r] - entity_embeddings[t]
+    )[:, None]
+    
+    # Simple corruption (head or tail), neg_samples per triple, shape (N, neg_samples)
+    h_rep = np.repeat(h[:, None], neg_samples, axis=1)
+    t_rep = np.repeat(t[:, None], neg_samples, axis=1)
+    corrupt_head = np.random.rand(len(arr), neg_samples) < 0.5
+    rand_ent = np.random.randint(0, num_entities, (len(arr), neg_samples))
+    h_neg = np.where(corrupt_head, rand_ent, h_rep)
+    t_neg = np.where(corrupt_head, t_rep, rand_ent)
+    neg_score = row_sq_norms(
+        entity_embeddings[h_neg] + relation_embeddings[r][:, None, :] - entity_embeddings[t_neg]
+    )
+    
+    # Margin-based ranking loss with relation weighting
+    loss = np.maximum(0.0, margin + pos_score - neg_score) * relation_importance[r][:, None]
+    return float(loss.mean())
+
+
+def pack_triples(
+    h: np.ndarray,
+    r: np.ndarray,
+    t: np.ndarray,
+    num_entities: int,
+    num_relations: int
+) -> np.ndarray:
+    """Encode (h, r, t) index arrays as unique int64 keys."""
+    return (h.astype(np.int64) * num_relations + r) * num_entities + t
+
+
+def build_known_keys(
+    h: np.ndarray,
+    r: np.ndarray,
+    t: np.ndarray,
+    num_entities: int,
+    num_relations: int
+) -> np.ndarray:
+    """Sorted pack_triples keys: an 8-byte-per-triple membership structure."""
+    if num_entities * num_relations * num_entities > np.iinfo(np.int64).max:
+        raise ValueError(f"KG too large to pack triples into int64 keys ({num_entities} entities, {num_relations} relations)")
+    return np.sort(pack_triples(h, r, t, num_entities, num_relations))
+
+
+def is_known(keys: np.ndarray, known_keys: np.ndarray) -> np.ndarray:
+    """Vectorized membership of packed keys in a sorted key array."""
+    idx = np.searchsorted(known_keys, keys)
+    member = idx < len(known_keys)
+    member[member] = known_keys[idx[member]] == keys[member]
+    return member
+
+
+def sample_negatives(
+    h: np.ndarray,
+    r: np.ndarray,
+    t: np.ndarray,
+    num_entities: int,
+    num_relations: int,
+    known_keys: np.ndarray,
+    max_attempts: int = 10
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Corrupt the head or the tail of every (h, r, t) with a random entity.
     
-    for h, r, t in triples:
-        rel_weight = relation_importance.get(r, 1.0)
+    Corruptions that hit a known triple (known_keys: sorted pack_triples keys)
+    are redrawn up to max_attempts times; any left over are kept as they are.
+    """
+    h_neg, t_neg = h.copy(), t.copy()
+    pending = np.arange(len(h))
+    for _ in range(max_attempts):
+        corrupt_head = np.random.rand(len(pending)) < 0.5
+        rand_ent = np.random.randint(0, num_entities, len(pending), dtype=h.dtype)
+        h_neg[pending] = np.where(corrupt_head, rand_ent, h[pending])
+        t_neg[pending] = np.where(corrupt_head, t[pending], rand_ent)
         
-        # Positive score
-        pos_score = compute_score(
-            entity_embeddings[h],
-            relation_embeddings[r],
-            entity_embeddings[t]
-        )
+        keys = pack_triples(h_neg[pending], r[pending], t_neg[pending], num_entities, num_relations)
+        pending = pending[is_known(keys, known_keys)]
+        if not len(pending):
+            break
+    return h_neg, t_neg
+
+
+def train_batch(
+    entity_embeddings: np.ndarray,
+    relation_embeddings: np.ndarray,
+    h: np.ndarray,
+    r: np.ndarray,
+    t: np.ndarray,
+    h_neg: np.ndarray,
+    t_neg: np.ndarray,
+    rel_weight: np.ndarray,
+    lr: float,
+    margin: float
+) -> float:
+    """One vectorized SGD step over aligned (positive, negative) index arrays.
+    
+    Embeddings are updated in place; returns the summed weighted margin loss.
+    Gradients are taken from the embeddings as they were at the start of the
+    batch and scatter-added, so repeated indices accumulate.
+    """
+    pos_diff = entity_embeddings[h] + relation_embeddings[r] - entity_embeddings[t]
+    neg_diff = entity_embeddings[h_neg] + relation_embeddings[r] - entity_embeddings[t_neg]
+    pos_score = row_sq_norms(pos_diff)
+    neg_score = row_sq_norms(neg_diff)
+    
+    # Margin-based ranking loss with relation weighting in loss only
+    loss = np.maximum(0.0, margin + pos_score - neg_score) * rel_weight
+    active = loss > 0
+    if not active.any():
+        return 0.0
+    h, r, t, h_neg, t_neg = h[active], r[active], t[active], h_neg[active], t_neg[active]
+    grad = lr * 2 * pos_diff[active]
+    grad_neg = lr * 2 * neg_diff[active]
+    
+    # L2 regularization as one multiplicative decay per touched row, then the gradients
+    touched = np.unique(np.concatenate([h, t, h_neg, t_neg]))
+    decay = 1.0 - lr * L2_LAMBDA
+    entity_embeddings[touched] *= decay
+    relation_embeddings[np.unique(r)] *= decay
+    
+    # Gradient update for positive and negative triples
+    np.add.at(entity_embeddings, h, -grad)
+    np.add.at(relation_embeddings, r, -grad)
+    np.add.at(entity_embeddings, t, grad)
+    np.add.at(entity_embeddings, h_neg, grad_neg)
+    np.add.at(relation_embeddings, r, grad_neg)
+    np.add.at(entity_embeddings, t_neg, -grad_neg)
+    
+    # Normalize touched entity embeddings (project to unit sphere)
+    project_to_unit_ball(entity_embeddings, touched)
+    
+    return float(loss.sum())
+
+
+def train_batch_shared(
+    entity_embeddings: np.ndarray,
+    relation_embeddings: np.ndarray,
+    h: np.ndarray,
+    r: np.ndarray,
+    t: np.ndarray,
+    rel_weight: np.ndarray,
+    lr: float,
+    margin: float,
+    pool_size: int = NEG_POOL_SIZE,
+    chunk_size: int = NEG_CHUNK_SIZE
+) -> float:
+    """SGD step where each chunk of positives shares one pool of negative entities.
+    
+    Every positive in a chunk of chunk_size is contrasted with all pool_size
+    pool entities, as corrupted tails or (per chunk, at random) corrupted heads.
+    Pool distances come from one (chunk, pool) matrix product and the gradients
+    are aggregated with matrix products, so no per-pair rows are gathered.
+    Returns the summed weighted margin loss over all chunk x pool pairs.
+    """
+    num_entities = entity_embeddings.shape[0]
+    total_loss = 0.0
+    for start in range(0, len(h), chunk_size):
+        hc, rc, tc = h[start:start + chunk_size], r[start:start + chunk_size], t[start:start + chunk_size]
+        pool = np.random.randint(0, num_entities, pool_size, dtype=h.dtype)
+        P = entity_embeddings[pool]
+        corrupt_head = np.random.rand() < 0.5
         
-        # Generate negative samples and compute loss
-        for _ in range(neg_samples):
-            # Simple corruption (head or tail)
-            if random.random() < 0.5:
-                h_neg = random.randint(0, num_entities - 1)
-                neg_score = compute_score(
-                    entity_embeddings[h_neg],
-                    relation_embeddings[r],
-                    entity_embeddings[t]
-                )
-            else:
-                t_neg = random.randint(0, num_entities - 1)
-                neg_score = compute_score(
-                    entity_embeddings[h],
-                    relation_embeddings[r],
-                    entity_embeddings[t_neg]
-                )
+        pos_diff = entity_embeddings[hc] + relation_embeddings[rc] - entity_embeddings[tc]
+        pos_score = row_sq_norms(pos_diff)
+        
+        # Corrupted tails score ||(h + r) - e||^2, corrupted heads ||e - (t - r)||^2
+        if corrupt_head:
+            Q = entity_embeddings[tc] - relation_embeddings[rc]
+        else:
+            Q = entity_embeddings[hc] + relation_embeddings[rc]
+        sq = np.einsum("ij,ij->i", Q, Q)[:, None] - 2 * (Q @ P.T) + np.einsum("ij,ij->i", P, P)[None, :]
+        neg_score = np.maximum(sq, 0.0)
+        
+        loss = np.maximum(0.0, margin + pos_score[:, None] - neg_score) * rel_weight[start:start + chunk_size, None]
+        active = (loss > 0).astype(entity_embeddings.dtype)
+        row_count = active.sum(axis=1)
+        if not row_count.any():
+            continue
+        total_loss += float(loss.sum())
+        pool_count = active.sum(axis=0)
+        
+        # Sums of 2 * (q_i - e_k) over active pairs, per positive and per pool entity
+        row_grad = lr * 2 * (row_count[:, None] * Q - active @ P)
+        pool_grad = lr * 2 * (active.T @ Q - pool_count[:, None] * P)
+        grad = lr * 2 * row_count[:, None] * pos_diff
+        
+        # L2 regularization as one multiplicative decay per touched row
+        touched = np.unique(np.concatenate([hc, tc, pool]))
+        decay = 1.0 - lr * L2_LAMBDA
+        entity_embeddings[touched] *= decay
+        relation_embeddings[np.unique(rc)] *= decay
+        
+        # Gradient update for negative triples, then positive triples
+        if corrupt_head:
+            np.add.at(entity_embeddings, pool, -pool_grad)
+            np.add.at(relation_embeddings, rc, -row_grad)
+            np.add.at(entity_embeddings, tc, row_grad)
+        else:
+            np.add.at(entity_embeddings, hc, row_grad)
+            np.add.at(relation_embeddings, rc, row_grad)
+            np.add.at(entity_embeddings, pool, -pool_grad)
+        np.add.at(entity_embeddings, hc, -grad)
+        np.add.at(relation_embeddings, rc, -grad)
+        np.add.at(entity_embeddings, tc, grad)
+        
+        project_to_unit_ball(entity_embeddings, touched)
+    return total_loss
+
+
+def project_to_unit_ball(entity_embeddings: np.ndarray, touched: np.ndarray) -> None:
+    """Rescale the (unique) rows touched whose norm exceeds 1 back onto the unit sphere, in place."""
+    # Each touched row is gathered once; only rows outside the ball are written back
+    rows = entity_embeddings[touched]
+    norms = row_norms(rows)
+    over = norms > 1.0
+    entity_embeddings[touched[over]] = rows[over] / norms[over, None]
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _train_batch_numba(E, Rel, h, r, t, h_neg, t_neg, rel_weight, lr, margin):
+        """Fused score/L2/gradient/projection passes; same contract as train_batch.
+        
+        Every touched row is decayed and projected once per batch, and the
+        gradients come from the start-of-batch differences. The gradient pass
+        runs over pairs in parallel with unsynchronised (Hogwild-style)
+        updates; TransE tolerates the occasional lost write.
+        """
+        n, dim = h.shape[0], E.shape[1]
+        decay = 1.0 - lr * L2_LAMBDA
+        pos_diff = np.empty((n, dim), dtype=E.dtype)
+        neg_diff = np.empty((n, dim), dtype=E.dtype)
+        active = np.zeros(n, dtype=np.bool_)
+        ent_touched = np.zeros(E.shape[0], dtype=np.bool_)
+        rel_touched = np.zeros(Rel.shape[0], dtype=np.bool_)
+        total = 0.0
+        # Score every pair before anything is written
+        for i in prange(n):
+            hi, ri, ti, hn, tn = h[i], r[i], t[i], h_neg[i], t_neg[i]
+            pos = 0.0
+            neg = 0.0
+            for k in range(dim):
+                d = E[hi, k] + Rel[ri, k] - E[ti, k]
+                pos_diff[i, k] = d
+                pos += d * d
+                d = E[hn, k] + Rel[ri, k] - E[tn, k]
+                neg_diff[i, k] = d
+                neg += d * d
+            loss = (margin + pos - neg) * rel_weight[i]
+            if loss <= 0:
+                continue
+            total += loss
+            active[i] = True
+            ent_touched[hi] = True
+            ent_touched[ti] = True
+            ent_touched[hn] = True
+            ent_touched[tn] = True
+            rel_touched[ri] = True
+        # L2 regularization as one multiplicative decay per touched row
+        for e in prange(E.shape[0]):
+            if ent_touched[e]:
+                for k in range(dim):
+                    E[e, k] *= decay
+        for q in prange(Rel.shape[0]):
+            if rel_touched[q]:
+                for k in range(dim):
+                    Rel[q, k] *= decay
+        # Gradient update for positive and negative triples
+        for i in prange(n):
+            if not active[i]:
+                continue
+            hi, ri, ti, hn, tn = h[i], r[i], t[i], h_neg[i], t_neg[i]
+            for k in range(dim):
+                g = lr * 2 * pos_diff[i, k]
+                g_neg = lr * 2 * neg_diff[i, k]
+                E[hi, k] -= g
+                E[ti, k] += g
+                E[hn, k] += g_neg
+                E[tn, k] -= g_neg
+                Rel[ri, k] += g_neg - g
+        # Normalize touched entity embeddings (project to unit sphere)
+        for e in prange(E.shape[0]):
+            if not ent_touched[e]:
+                continue
+            sq = 0.0
+            for k in range(dim):
+                sq += E[e, k] * E[e, k]
+            if sq > 1.0:
+                inv = 1.0 / np.sqrt(sq)
+                for k in range(dim):
+                    E[e, k] *= inv
+        return total
+
+
+def compute_relation_importance(
+    relation_to_idx: Dict[str, int],
+    relation_types: Dict[str, str]
+) -> np.ndarray:
+    """Per-relation loss weights as a dense array indexed by relation id."""
+    relation_importance = np.ones(len(relation_to_idx), dtype=np.float32)
+    for relation, idx in relation_to_idx.items():
+        rel_type = relation_types.get(relation, "other")
+        relation_importance[idx] = RELATION_WEIGHTS.get(rel_type, 1.0)
+    return relation_importance
+
+
+def make_torch_trainer(
+    train_arr: np.ndarray,
+    entity_embeddings: np.ndarray,
+    relation_embeddings: np.ndarray,
+    relation_importance: np.ndarray,
+    batch_size: int,
+    margin: float,
+    neg_samples: int
+):
+    """Build (run_epoch, snapshot) closures that train TransE with PyTorch.
+    
+    Embeddings live in torch.nn.Embedding tables on CUDA when available and are
+    optimised with Adam over the batched, relation-weighted margin loss.
+    snapshot() returns the current tables as NumPy arrays.
+    """
+    import torch  # Optional: only needed for TRANSE_BACKEND=torch
+    import torch.nn.functional as F
+    
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    print(f"  Backend: torch ({device})")
+    ent = torch.nn.Embedding.from_pretrained(torch.from_numpy(entity_embeddings), freeze=False).to(device)
+    rel = torch.nn.Embedding.from_pretrained(torch.from_numpy(relation_embeddings), freeze=False).to(device)
+    opt = torch.optim.Adam(
+        list(ent.parameters()) + list(rel.parameters()), lr=LEARNING_RATE, weight_decay=L2_LAMBDA
+    )
+    rel_weight = torch.from_numpy(relation_importance).to(device)
+    triples = torch.from_numpy(train_arr.astype(np.int64)).to(device)
+    num_entities = entity_embeddings.shape[0]
+    steps = 0
+    
+    def run_epoch(lr: float) -> float:
+        nonlocal steps
+        for group in opt.param_groups:
+            group["lr"] = lr
+        total_loss = torch.zeros((), device=device)
+        perm = torch.randperm(len(triples), device=device)
+        for batch_start in range(0, len(perm), batch_size):
+            batch = triples[perm[batch_start:batch_start + batch_size]].repeat_interleave(neg_samples, dim=0)
+            h, r, t = batch.unbind(1)
+            corrupt_head = torch.rand(len(batch), device=device) < 0.5
+            rand_ent = torch.randint(0, num_entities, (len(batch),), device=device)
+            h_neg = torch.where(corrupt_head, rand_ent, h)
+            t_neg = torch.where(corrupt_head, t, rand_ent)
+            
+            r_emb = rel(r)
+            pos_score = (ent(h) + r_emb - ent(t)).pow(2).sum(dim=1)
+            neg_score = (ent(h_neg) + r_emb - ent(t_neg)).pow(2).sum(dim=1)
+            loss = F.relu(margin + pos_score - neg_score) * rel_weight[r]
             
-            # Margin-based ranking loss with relation weighting
-            loss = max(0.0, margin + pos_score - neg_score) * rel_weight
-            total_loss += loss
-            count += 1
+            opt.zero_grad()
+            loss.mean().backward()
+            opt.step()
+            total_loss += loss.detach().sum()
+            
+            steps += 1
+            if steps % TORCH_NORMALIZE_EVERY == 0:
+                with torch.no_grad():
+                    ent.weight.renorm_(p=2, dim=0, maxnorm=1.0)
+        return float(total_loss) / neg_samples
+    
+    def snapshot() -> Tuple[np.ndarray, np.ndarray]:
+        return ent.weight.detach().cpu().numpy(), rel.weight.detach().cpu().numpy()
+    
+    return run_epoch, snapshot
+
+
+def run_batches(
+    entity_embeddings: np.ndarray,
+    relation_embeddings: np.ndarray,
+    order: np.ndarray,
+    H: np.ndarray,
+    R: np.ndarray,
+    T: np.ndarray,
+    relation_importance: np.ndarray,
+    known_keys: np.ndarray,
+    lr: float,
+    margin: float,
+    batch_size: int,
+    neg_samples: int
+) -> float:
+    """Run the NumPy/Numba SGD steps over the training positives listed in order.
+    
+    Returns the summed loss divided by the negatives per positive, i.e. the
+    total loss per (positive, negative) pair times len(order).
+    """
+    num_entities, num_relations = entity_embeddings.shape[0], relation_embeddings.shape[0]
+    step = _train_batch_numba if njit is not None else train_batch
+    total_loss = 0.0
+    
+    for batch_start in range(0, len(order), batch_size):
+        idx = order[batch_start:batch_start + batch_size]
+        if SHARED_NEGATIVES:
+            # Scale the step so each positive moves as much as with neg_samples negatives
+            total_loss += train_batch_shared(
+                entity_embeddings, relation_embeddings,
+                H[idx], R[idx], T[idx], relation_importance[R[idx]],
+                lr * neg_samples / NEG_POOL_SIZE, margin
+            )
+            continue
+        
+        # Each positive is paired with neg_samples corruptions of its own
+        h = np.repeat(H[idx], neg_samples)
+        r = np.repeat(R[idx], neg_samples)
+        t = np.repeat(T[idx], neg_samples)
+        h_neg, t_neg = sample_negatives(h, r, t, num_entities, num_relations, known_keys)
+        
+        total_loss += step(
+            entity_embeddings, relation_embeddings,
+            h, r, t, h_neg, t_neg, relation_importance[r],
+            lr, margin
+        )
+    return total_loss / (NEG_POOL_SIZE if SHARED_NEGATIVES else neg_samples)
+
+
+# Per-process state of Hogwild workers (set by _hogwild_init)
+_HOGWILD: Dict[str, object] = {}
+
+
+def _hogwild_init(shm_names: Tuple[str, str], shapes: Tuple[tuple, tuple], dtype: str, args: tuple) -> None:
+    # Spawned workers share the parent's resource tracker, so the parent's unlink covers these too
+    segments = [SharedMemory(name=name) for name in shm_names]
+    _HOGWILD["segments"] = segments
+    _HOGWILD["tables"] = [np.ndarray(shape, dtype=dtype, buffer=shm.buf) for shm, shape in zip(segments, shapes)]
+    _HOGWILD["args"] = args
+
+
+def _hogwild_epoch(order: np.ndarray, lr: float) -> float:
+    entity_embeddings, relation_embeddings = _HOGWILD["tables"]
+    H, R, T, relation_importance, known_keys, margin, batch_size, neg_samples = _HOGWILD["args"]
+    return run_batches(
+        entity_embeddings, relation_embeddings, order, H, R, T,
+        relation_importance, known_keys, lr, margin, batch_size, neg_samples
+    )
+
+
+def make_hogwild_trainer(
+    train_arr: np.ndarray,
+    entity_embeddings: np.ndarray,
+    relation_embeddings: np.ndarray,
+    relation_importance: np.ndarray,
+    batch_size: int,
+    margin: float,
+    neg_samples: int,
+    num_workers: int,
+    cleanup: contextlib.ExitStack
+):
+    """Build (run_epoch, snapshot) closures that train with num_workers processes.
+    
+    The embedding tables live in multiprocessing shared memory; every epoch the
+    shuffled positives are split across the workers, which run their batches
+    directly on the shared tables without locking (Hogwild!). The pool and the
+    shared segments are released through cleanup.
+    """
+    print(f"  Backend: numpy, {num_workers} Hogwild workers")
+    tables = []
+    for array in (entity_embeddings, relation_embeddings):
+        shm = SharedMemory(create=True, size=array.nbytes)
+        cleanup.callback(shm.unlink)
+        cleanup.callback(shm.close)
+        table = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+        table[:] = array
+        tables.append((shm, table))
+    (ent_shm, ent_table), (rel_shm, rel_table) = tables
+    
+    H, R, T = train_arr[:, 0], train_arr[:, 1], train_arr[:, 2]
+    known_keys = build_known_keys(H, R, T, entity_embeddings.shape[0], relation_embeddings.shape[0])
+    args = (H, R, T, relation_importance, known_keys, margin, batch_size, neg_samples)
+    pool = multiprocessing.get_context("spawn").Pool(
+        num_workers, initializer=_hogwild_init,
+        initargs=((ent_shm.name, rel_shm.name), (ent_table.shape, rel_table.shape), ent_table.dtype.str, args)
+    )
+    cleanup.callback(pool.join)
+    cleanup.callback(pool.terminate)
+    
+    def run_epoch(lr: float) -> float:
+        parts = np.array_split(np.random.permutation(len(train_arr)), num_workers)
+        return sum(pool.starmap(_hogwild_epoch, [(part, lr) for part in parts]))
+    
+    def snapshot() -> Tuple[np.ndarray, np.ndarray]:
+        return ent_table, rel_table
     
-    return total_loss / max(count, 1)
+    return run_epoch, snapshot
 
 
 def train_transe_enhanced(
@@ -362,18 +824,17 @@ def train_transe_enhanced(
     val_triples: List[Tuple[int, int, int]],
     entity_embeddings: np.ndarray,
     relation_embeddings: np.ndarray,
-    relation_types: Dict[str, str],
-    relation_to_idx: Dict[str, int],
+    relation_importance: np.ndarray,
     num_epochs: int,
     batch_size: int,
     learning_rate: float,
     margin: float,
     neg_samples: int,
-    patience: int
+    patience: int,
+    backend: str = TRAIN_BACKEND
 ) -> Tuple[np.ndarray, np.ndarray]:
     """Train TransE model with advanced techniques."""
     num_entities = entity_embeddings.shape[0]
-    triple_set = set(train_triples)
     
     print(f"\nTraining TransE with advanced techniques:")
     print(f"  Max epochs: {num_epochs}")
@@ -385,14 +846,6 @@ def train_transe_enhanced(
     print(f"  Training triples: {len(train_triples)}")
     print(f"  Validation triples: {len(val_triples)}\n")
     
-    # Pre-compute relation importance scores
-    idx_to_relation = {idx: relation for relation, idx in relation_to_idx.items()}
-    relation_importance = {}
-    for idx in range(len(relation_to_idx)):
-        relation = idx_to_relation[idx]
-        rel_type = relation_types.get(relation, "other")
-        relation_importance[idx] = RELATION_WEIGHTS.get(rel_type, 1.0)
-    
     best_val_score = float('inf')
     patience_counter = 0
     best_entity_embeddings = entity_embeddings.copy()
@@ -401,123 +854,80 @@ def train_transe_enhanced(
     # Learning rate scheduler
     initial_lr = learning_rate
     
-    for epoch in range(num_epochs):
-        # Decay learning rate
-        current_lr = initial_lr / (1 + 0.01 * epoch)
-        
-        total_loss = 0.0
-        random.shuffle(train_triples)
+    train_arr = np.asarray(train_triples, dtype=np.int32).reshape(-1, 3)
+    cleanup = contextlib.ExitStack()  # releases worker pools / shared memory when training ends
+    
+    if backend == "torch":
+        run_epoch, snapshot = make_torch_trainer(
+            train_arr, entity_embeddings, relation_embeddings, relation_importance,
+            batch_size, margin, neg_samples
+        )
+    elif TRAIN_WORKERS > 1:
+        run_epoch, snapshot = make_hogwild_trainer(
+            train_arr, entity_embeddings, relation_embeddings, relation_importance,
+            batch_size, margin, neg_samples, TRAIN_WORKERS, cleanup
+        )
+    else:
+        H, R, T = train_arr[:, 0], train_arr[:, 1], train_arr[:, 2]
+        known_keys = build_known_keys(H, R, T, num_entities, relation_embeddings.shape[0])
         
-        # Process in batches
-        num_batches = (len(train_triples) + batch_size - 1) // batch_size
+        def run_epoch(lr: float) -> float:
+            order = np.random.permutation(len(train_arr))
+            return run_batches(
+                entity_embeddings, relation_embeddings, order, H, R, T,
+                relation_importance, known_keys, lr, margin, batch_size, neg_samples
+            )
         
-        for batch_idx, batch_start in enumerate(range(0, len(train_triples), batch_size)):
-            batch_triples = train_triples[batch_start:batch_start + batch_size]
-            batch_loss = 0.0
+        def snapshot() -> Tuple[np.ndarray, np.ndarray]:
+            return entity_embeddings, relation_embeddings
+    
+    with cleanup:
+        for epoch in range(num_epochs):
+            # Decay learning rate
+            current_lr = initial_lr / (1 + 0.01 * epoch)
             
-            for h, r, t in batch_triples:
-                rel_weight = relation_importance.get(r, 1.0)
-                
-                # Positive triple score
-                pos_score = compute_score(
-                    entity_embeddings[h],
-                    relation_embeddings[r],
-                    entity_embeddings[t]
-                )
-                
-                # Negative samples
-                for _ in range(neg_samples):
-                    h_neg, r_neg, t_neg = generate_negative_sample((h, r, t), num_entities, triple_set)
-                    
-                    neg_score = compute_score(
-                        entity_embeddings[h_neg],
-                        relation_embeddings[r_neg],
-                        entity_embeddings[t_neg]
-                    )
-                    
-                    # Margin-based ranking loss with relation weighting in loss only
-                    loss = max(0, margin + pos_score - neg_score) * rel_weight
-                    
-                    if loss > 0:
-                        batch_loss += loss
-                        
-                        # Use current learning rate (no relation weight multiplication)
-                        adaptive_lr = current_lr
-                        
-                        # Gradient update for positive triple
-                        grad = 2 * (entity_embeddings[h] + relation_embeddings[r] - entity_embeddings[t])
-                        entity_embeddings[h] -= adaptive_lr * grad
-                        relation_embeddings[r] -= adaptive_lr * grad
-                        entity_embeddings[t] += adaptive_lr * grad
-                        
-                        # Gradient update for negative triple
-                        grad_neg = 2 * (entity_embeddings[h_neg] + relation_embeddings[r_neg] - entity_embeddings[t_neg])
-                        entity_embeddings[h_neg] += adaptive_lr * grad_neg
-                        relation_embeddings[r_neg] += adaptive_lr * grad_neg
-                        entity_embeddings[t_neg] -= adaptive_lr * grad_neg
-                        
-                        # L2 regularization
-                        entity_embeddings[h] -= adaptive_lr * L2_LAMBDA * entity_embeddings[h]
-                        entity_embeddings[t] -= adaptive_lr * L2_LAMBDA * entity_embeddings[t]
-                        entity_embeddings[h_neg] -= adaptive_lr * L2_LAMBDA * entity_embeddings[h_neg]
-                        entity_embeddings[t_neg] -= adaptive_lr * L2_LAMBDA * entity_embeddings[t_neg]
-                        relation_embeddings[r] -= adaptive_lr * L2_LAMBDA * relation_embeddings[r]
-                        
-                        # Normalize entity embeddings (project to unit sphere)
-                        norm_h = np.linalg.norm(entity_embeddings[h])
-                        norm_t = np.linalg.norm(entity_embeddings[t])
-                        norm_h_neg = np.linalg.norm(entity_embeddings[h_neg])
-                        norm_t_neg = np.linalg.norm(entity_embeddings[t_neg])
-                        
-                        if norm_h > 1:
-                            entity_embeddings[h] /= norm_h
-                        if norm_t > 1:
-                            entity_embeddings[t] /= norm_t
-                        if norm_h_neg > 1:
-                            entity_embeddings[h_neg] /= norm_h_neg
-                        if norm_t_neg > 1:
-                            entity_embeddings[t_neg] /= norm_t_neg
+            total_loss = run_epoch(current_lr)
+            entity_embeddings, relation_embeddings = snapshot()
             
-            total_loss += batch_loss
-        
-        # Calculate average training loss
-        avg_train_loss = total_loss / (len(train_triples) * neg_samples) if len(train_triples) > 0 else 0
-        
-        # Evaluate on validation set using margin-based loss
-        val_score = evaluate_model_margin(
-            val_triples, 
-            entity_embeddings, 
-            relation_embeddings,
-            relation_importance, 
-            num_entities,
-            neg_samples=3,
-            margin=margin
-        )
-        
-        # Early stopping check
-        if val_score < best_val_score:
-            best_val_score = val_score
-            best_entity_embeddings = entity_embeddings.copy()
-            best_relation_embeddings = relation_embeddings.copy()
-            patience_counter = 0
-        else:
-            patience_counter += 1
-        
-        # Print progress
-        if (epoch + 1) % 5 == 0 or epoch == 0:
-            print(f"Epoch {epoch + 1:3d}/{num_epochs} - Train Loss: {avg_train_loss:.4f} - Val Loss: {val_score:.4f} - LR: {current_lr:.6f} - Best Val: {best_val_score:.4f}")
-        
-        # Early stopping
-        if patience_counter >= patience:
-            print(f"\nEarly stopping at epoch {epoch + 1}. Best validation loss: {best_val_score:.4f}")
-            break
+            # Calculate average training loss
+            avg_train_loss = total_loss / len(train_triples) if len(train_triples) > 0 else 0
+            
+            # Evaluate on validation set using margin-based loss
+            val_score = evaluate_model_margin(
+                val_triples, 
+                entity_embeddings, 
+                relation_embeddings,
+                relation_importance, 
+                num_entities,
+                neg_samples=3,
+                margin=margin
+            )
+            
+            # Early stopping check
+            if val_score < best_val_score:
+                best_val_score = val_score
+                best_entity_embeddings = entity_embeddings.copy()
+                best_relation_embeddings = relation_embeddings.copy()
+                patience_counter = 0
+            else:
+                patience_counter += 1
+            
+            # Print progress
+            if (epoch + 1) % 5 == 0 or epoch == 0:
+                print(f"Epoch {epoch + 1:3d}/{num_epochs} - Train Loss: {avg_train_loss:.4f} - Val Loss: {val_score:.4f} - LR: {current_lr:.6f} - Best Val: {best_val_score:.4f}")
+            
+            # Early stopping
+            if patience_counter >= patience:
+                print(f"\nEarly stopping at epoch {epoch + 1}. Best validation loss: {best_val_score:.4f}")
+                break
     
     return best_entity_embeddings, best_relation_embeddings
 
 
 def main() -> None:
     print(f"Loading KG from {KG_FILE}...")
-    indexed_triples, entity_to_idx, relation_to_idx, entity_types, relation_types = load_kg_triples(KG_FILE)
+    (indexed_triples, entity_to_idx, relation_to_idx, entity_types, relation_types,
+     entities_sorted, relations_sorted) = load_kg_triples(KG_FILE)
     
     num_entities = len(entity_to_idx)
     num_relations = len(relation_to_idx)
@@ -556,14 +966,16 @@ def main() -> None:
         entity_types, relation_types
     )
     
+    # Pre-compute relation importance scores
+    relation_importance = compute_relation_importance(relation_to_idx, relation_types)
+    
     # Train TransE with enhanced features
     entity_embeddings, relation_embeddings = train_transe_enhanced(
         train_triples,
         val_triples,
         entity_embeddings,
         relation_embeddings,
-        relation_types,
-        relation_to_idx,
+        relation_importance,
         NUM_EPOCHS,
         BATCH_SIZE,
         LEARNING_RATE,
@@ -572,46 +984,39 @@ def main() -> None:
         PATIENCE
     )
     
-    # Save embeddings using np.save (creates proper .npy files)
+    # Save embeddings as plain .npy files (memory-mappable with np.load(mmap_mode="r"))
     print("\nSaving outputs...")
-    np.save(OUTPUT_ENTITY_EMBEDDINGS, entity_embeddings)
-    np.save(OUTPUT_RELATION_EMBEDDINGS, relation_embeddings)
-    
-    # Create reverse mappings for saving
-    idx_to_entity = {idx: entity for entity, idx in entity_to_idx.items()}
-    idx_to_relation = {idx: relation for relation, idx in relation_to_idx.items()}
+    np.save(OUTPUT_ENTITY_EMBEDDINGS, entity_embeddings.astype(OUTPUT_DTYPE), allow_pickle=False)
+    np.save(OUTPUT_RELATION_EMBEDDINGS, relation_embeddings.astype(OUTPUT_DTYPE), allow_pickle=False)
+    if SAVE_FULL_PRECISION:
+        np.save(OUTPUT_ENTITY_EMBEDDINGS.with_name("entity_embeddings_fp32.npy"), entity_embeddings, allow_pickle=False)
+        np.save(OUTPUT_RELATION_EMBEDDINGS.with_name("relation_embeddings_fp32.npy"), relation_embeddings, allow_pickle=False)
     
     # Save entity mapping with type information
-    with OUTPUT_ENTITY_MAP.open("w", encoding="utf-8") as f:
-        f.write("idx\tURI\tlabel\ttype\n")
-        for idx in range(num_entities):
-            entity = idx_to_entity[idx]
-            label = extract_label_from_uri(entity)
-            entity_type = entity_types.get(entity, "Unknown")
-            f.write(f"{idx}\t{entity}\t{label}\t{entity_type}\n")
+    entity_lines = [
+        f"{idx}\t{entity}\t{extract_label_from_uri(entity)}\t{entity_types.get(entity, 'Unknown')}\n"
+        for idx, entity in enumerate(entities_sorted)
+    ]
+    OUTPUT_ENTITY_MAP.write_text("idx\tURI\tlabel\ttype\n" + "".join(entity_lines), encoding="utf-8")
     
     # Save relation mapping with type information
-    with OUTPUT_RELATION_MAP.open("w", encoding="utf-8") as f:
-        f.write("idx\tURI\tlabel\ttype\tweight\n")
-        for idx in range(num_relations):
-            relation = idx_to_relation[idx]
-            label = extract_label_from_uri(relation)
-            relation_type = relation_types.get(relation, "other")
-            weight = RELATION_WEIGHTS.get(relation_type, 1.0)
-            f.write(f"{idx}\t{relation}\t{label}\t{relation_type}\t{weight}\n")
+    relation_lines = []
+    for idx, relation in enumerate(relations_sorted):
+        relation_type = relation_types.get(relation, "other")
+        weight = RELATION_WEIGHTS.get(relation_type, 1.0)
+        relation_lines.append(f"{idx}\t{relation}\t{extract_label_from_uri(relation)}\t{relation_type}\t{weight}\n")
+    OUTPUT_RELATION_MAP.write_text("idx\tURI\tlabel\ttype\tweight\n" + "".join(relation_lines), encoding="utf-8")
     
     # Save triples with indices
-    with OUTPUT_TRIPLES.open("w", encoding="utf-8") as f:
-        f.write("head\trelation\ttail\n")
-        for h, r, t in indexed_triples:
-            f.write(f"{h}\t{r}\t{t}\n")
+    triples_arr = np.asarray(indexed_triples, dtype=np.int32).reshape(-1, 3)
+    np.savetxt(OUTPUT_TRIPLES, triples_arr, fmt="%d", delimiter="\t", header="head\trelation\ttail", comments="")
     
     print(f"\n{'='*70}")
     print(f"Training Complete!")
     print(f"{'='*70}")
-    print(f"Entity embeddings: ({num_entities}, {EMBEDDING_DIM})")
+    print(f"Entity embeddings: ({num_entities}, {EMBEDDING_DIM}) {np.dtype(OUTPUT_DTYPE).name}")
     print(f"  -> {OUTPUT_ENTITY_EMBEDDINGS.resolve()}")
-    print(f"Relation embeddings: ({num_relations}, {EMBEDDING_DIM})")
+    print(f"Relation embeddings: ({num_relations}, {EMBEDDING_DIM}) {np.dtype(OUTPUT_DTYPE).name}")
     print(f"  -> {OUTPUT_RELATION_EMBEDDINGS.resolve()}")
     print(f"Entity mapping -> {OUTPUT_ENTITY_MAP.resolve()}")
     print(f"Relation mapping -> {OUTPUT_RELATION_MAP.resolve()}")
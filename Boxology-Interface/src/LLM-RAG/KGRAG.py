@@ -9,15 +9,37 @@ Pipeline:
 
 from __future__ import annotations
 
+import csv
+import functools
+import hashlib
 import json
 import pathlib
 import re
 import os
 import socket
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Tuple
 
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+
+# Optional SIMD cosine kernels; NumPy matmul is used when unavailable
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+# Optional compiled dot-product kernel, used when simsimd is not installed
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# Optional C-engine TSV parsing for the map/triple files; line loops otherwise
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
 
 
 # File paths - relative to this file's location
@@ -33,8 +55,14 @@ GLOSSARY_FILE = _CURRENT_DIR.parent.parent / "dataset" / "glossary.txt"
 # Config
 EMBEDDING_DIM = 100
 TOP_K = 5  # Number of similar entities to retrieve
+SEED_K = 3  # Label matches averaged into the query embedding
+INT8_SEARCH = os.getenv("KGRAG_INT8_SEARCH", "1") != "0"  # int8 similarity scans (needs simsimd)
+RELATION_PATTERN_SAMPLE = 100  # Leading triples summarised as "key relationship patterns"
 RESPONSE_TEMPLATE = """Here is what I know about this node based on the boxology JSON and KG:\n{body}"""
 
+# N-Triples line: subject and predicate URIs, then a URI or a quoted literal object
+_NT_RE = re.compile(r'<([^>]+)>\s+<([^>]+)>\s+(?:<([^>]+)>|"([^"]+)")')
+
 
 # LLM API configuration with smart host detection
 def _detect_ollama_host() -> str:
@@ -76,6 +104,8 @@ def _detect_ollama_host() -> str:
 OLLAMA_HOST = _detect_ollama_host()
 OLLAMA_API_URL = f"http://{OLLAMA_HOST}:11434/api/generate"  # Use detected host
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:1b")
+OLLAMA_EMBED_URL = f"http://{OLLAMA_HOST}:11434/api/embed"
+OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", OLLAMA_MODEL)
 
 # Option 2: Use Hugging Face API (requires token for some models)
 HF_API_URL = "https://api-inference.huggingface.co/models/google/flan-t5-large"
@@ -84,22 +114,106 @@ HF_API_TOKEN = os.getenv("HF_API_TOKEN", None)
 MAX_NEW_TOKENS = int(os.getenv("MAX_NEW_TOKENS", "200"))
 TEMPERATURE = float(os.getenv("TEMPERATURE", "0.7"))
 
+# On-disk cache of LLM answers keyed by model, generation settings and prompt
+LLM_CACHE_DIR = _CURRENT_DIR / ".kgrag_cache"
+LLM_CACHE_ENABLED = os.getenv("KGRAG_LLM_CACHE", "1") != "0"
+EMBEDDING_CACHE_DIR = LLM_CACHE_DIR / "embeddings"
+EMBED_BATCH_SIZE = 32  # Texts per /api/embed request; each batch is cached as it arrives
+
+# Semantic matching over glossary lines and JSON node labels (needs Ollama embeddings)
+GLOSSARY_HINTS = 3  # Glossary lines added to each prompt
+NODE_MATCH_MIN_SIMILARITY = 0.5  # Cosine needed for an embedding-only node match
+
 print(f"[KGRAG] Ollama API URL: {OLLAMA_API_URL}")
 
+def _embedding_cache_path(text: str) -> pathlib.Path:
+    key_source = json.dumps([OLLAMA_EMBED_MODEL, text])
+    key = hashlib.blake2b(key_source.encode("utf-8"), digest_size=16).hexdigest()
+    return EMBEDDING_CACHE_DIR / f"{key}.npy"
+
+
+# One keep-alive session for all Ollama/HuggingFace calls
+_SESSION = requests.Session()
+_SESSION.headers.update({"Content-Type": "application/json"})
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+
+def _llm_cache_path(prompt: str, max_new_tokens: int) -> pathlib.Path:
+    key_source = json.dumps([OLLAMA_MODEL, HF_API_URL, TEMPERATURE, max_new_tokens, prompt])
+    key = hashlib.blake2b(key_source.encode("utf-8"), digest_size=16).hexdigest()
+    return LLM_CACHE_DIR / f"{key}.json"
+
+
+def _read_llm_cache(prompt: str, max_new_tokens: int) -> str | None:
+    if not LLM_CACHE_ENABLED:
+        return None
+    try:
+        data = json.loads(_llm_cache_path(prompt, max_new_tokens).read_text(encoding="utf-8"))
+        return data.get("response")
+    except (OSError, ValueError):
+        return None
+
+
+def _write_llm_cache(prompt: str, max_new_tokens: int, response: str) -> None:
+    if not LLM_CACHE_ENABLED:
+        return
+    try:
+        LLM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        path = _llm_cache_path(prompt, max_new_tokens)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"model": OLLAMA_MODEL, "response": response}), encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[KGRAG] Could not write LLM cache: {e}")
+
+
+def _open_embedding_matrix(path: pathlib.Path) -> np.ndarray:
+    """Memory-map an (N, EMBEDDING_DIM) embedding file read-only.
+
+    Handles both .npy files written by np.save (any float dtype) and raw
+    float32 dumps without a header.
+    """
+    with path.open("rb") as f:
+        is_npy = f.read(6) == b"\x93NUMPY"
+    if is_npy:
+        matrix = np.load(path, mmap_mode="r", allow_pickle=False)
+    else:
+        rows = path.stat().st_size // (np.dtype(np.float32).itemsize * EMBEDDING_DIM)
+        matrix = np.memmap(path, dtype=np.float32, mode="r", shape=(rows, EMBEDDING_DIM))
+    return matrix.reshape(-1, EMBEDDING_DIM)
+
 
 def load_embeddings() -> Tuple[np.ndarray, np.ndarray]:
-    """Load entity and relation embeddings."""
-    entity_bytes = ENTITY_EMBEDDINGS_FILE.read_bytes()
-    relation_bytes = RELATION_EMBEDDINGS_FILE.read_bytes()
-    
-    entity_embeddings = np.frombuffer(entity_bytes, dtype=np.float32)
-    relation_embeddings = np.frombuffer(relation_bytes, dtype=np.float32)
+    """Load entity and relation embeddings as read-only memory maps."""
+    entity_embeddings = _open_embedding_matrix(ENTITY_EMBEDDINGS_FILE)
+    relation_embeddings = _open_embedding_matrix(RELATION_EMBEDDINGS_FILE)
     
     return entity_embeddings, relation_embeddings
 
 
+def _read_tsv(path: pathlib.Path, names: List[str], dtypes: Dict[str, type]):
+    """Read the leading columns of a headerless TSV file with pandas' C parser."""
+    return pd.read_csv(
+        path, sep="\t", header=None, names=names, usecols=range(len(names)), dtype=dtypes,
+        quoting=csv.QUOTE_NONE, keep_default_na=False, engine="c", encoding="utf-8",
+    )
+
+
+def _read_label_map(path: pathlib.Path) -> Tuple[List[int], List[str], List[str]]:
+    """(idx, URI, label) columns of a map file, skipping rows without a label."""
+    df = _read_tsv(path, ["idx", "uri", "label"], {"idx": np.int64, "uri": str, "label": str})
+    labels = df["label"].str.rstrip()
+    df = df[labels != ""]
+    return df["idx"].tolist(), df["uri"].tolist(), labels[labels != ""].tolist()
+
+
 def load_entity_map() -> Tuple[Dict[int, str], Dict[str, int], Dict[int, str]]:
     """Load entity index mappings."""
+    if pd is not None:
+        idxs, uris, labels = _read_label_map(ENTITY_MAP_FILE)
+        return dict(zip(idxs, uris)), dict(zip(uris, idxs)), dict(zip(idxs, labels))
+    
     idx_to_uri = {}
     uri_to_idx = {}
     idx_to_label = {}
@@ -120,6 +234,10 @@ def load_entity_map() -> Tuple[Dict[int, str], Dict[str, int], Dict[int, str]]:
 
 def load_relation_map() -> Tuple[Dict[int, str], Dict[int, str]]:
     """Load relation index mappings."""
+    if pd is not None:
+        idxs, uris, labels = _read_label_map(RELATION_MAP_FILE)
+        return dict(zip(idxs, uris)), dict(zip(idxs, labels))
+    
     idx_to_uri = {}
     idx_to_label = {}
     
@@ -136,8 +254,21 @@ def load_relation_map() -> Tuple[Dict[int, str], Dict[int, str]]:
     return idx_to_uri, idx_to_label
 
 
-def load_triples() -> List[Tuple[int, int, int]]:
-    """Load indexed triples."""
+def build_label_array(idx_to_label: Dict[int, str], prefix: str, size: int = 0) -> np.ndarray:
+    """Dense object array of labels indexed by id; missing ids get "<prefix>_<id>"."""
+    size = max([size] + [idx + 1 for idx in idx_to_label])
+    labels = np.array([f"{prefix}_{i}" for i in range(size)], dtype=object)
+    if idx_to_label:
+        labels[np.fromiter(idx_to_label.keys(), dtype=np.int64, count=len(idx_to_label))] = list(idx_to_label.values())
+    return labels
+
+
+def load_triples() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Load indexed triples as (heads, relations, tails) int32 arrays."""
+    if pd is not None:
+        df = _read_tsv(TRIPLES_FILE, ["h", "r", "t"], {"h": np.int32, "r": np.int32, "t": np.int32})
+        return df["h"].to_numpy(), df["r"].to_numpy(), df["t"].to_numpy()
+    
     triples = []
     with TRIPLES_FILE.open("r", encoding="utf-8") as f:
         for line in f:
@@ -145,7 +276,8 @@ def load_triples() -> List[Tuple[int, int, int]]:
             if len(parts) == 3:
                 h, r, t = int(parts[0]), int(parts[1]), int(parts[2])
                 triples.append((h, r, t))
-    return triples
+    heads, rels, tails = np.asarray(triples, dtype=np.int32).reshape(-1, 3).T
+    return np.ascontiguousarray(heads), np.ascontiguousarray(rels), np.ascontiguousarray(tails)
 
 
 def parse_nt_triple(line: str) -> Tuple[str, str, str] | None:
@@ -154,34 +286,60 @@ def parse_nt_triple(line: str) -> Tuple[str, str, str] | None:
     if not line or line.startswith("#"):
         return None
     
-    pattern = r'<([^>]+)>\s+<([^>]+)>\s+<([^>]+)>|<([^>]+)>\s+<([^>]+)>\s+"([^"]+)"'
-    match = re.match(pattern, line)
-    
+    match = _NT_RE.match(line)
     if match:
-        if match.group(1):
-            return (match.group(1), match.group(2), match.group(3))
-        elif match.group(4):
-            return (match.group(4), match.group(5), match.group(6))
+        subject, predicate, obj_uri, obj_literal = match.groups()
+        return (subject, predicate, obj_uri if obj_uri is not None else obj_literal)
     return None
 
 
-def build_entity_context(entity_idx: int, triples: List[Tuple[int, int, int]], 
-                        entity_labels: Dict[int, str], relation_labels: Dict[int, str]) -> str:
-    """Build context description for an entity from its triples."""
+def build_adjacency(heads: np.ndarray, tails: np.ndarray,
+                    num_entities: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """CSR-style index of triple positions by head and by tail entity.
+
+    Returns (out_order, out_ptr, in_order, in_ptr): the positions of the
+    triples headed by entity i are out_order[out_ptr[i]:out_ptr[i + 1]], in
+    file order, and likewise for tails.
+    """
+    num_entities = max(num_entities, int(heads.max(initial=-1)) + 1, int(tails.max(initial=-1)) + 1)
+    bounds = np.arange(num_entities + 1)
+    out_order = np.argsort(heads, kind="stable")
+    in_order = np.argsort(tails, kind="stable")
+    out_ptr = np.searchsorted(heads[out_order], bounds)
+    in_ptr = np.searchsorted(tails[in_order], bounds)
+    return out_order, out_ptr, in_order, in_ptr
+
+
+def build_entity_context(entity_idx: int, heads: np.ndarray, rels: np.ndarray, tails: np.ndarray,
+                        entity_labels: np.ndarray, relation_labels: np.ndarray,
+                        adjacency: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray] | None = None) -> str:
+    """Build context description for an entity from its triples.
+
+    Labels are dense arrays from build_label_array. With adjacency from
+    build_adjacency only the entity's own triples are visited; otherwise
+    they are found with one vectorised compare over the triple arrays.
+    """
     outgoing = []
     incoming = []
     
-    for h, r, t in triples:
+    if adjacency is None:
+        positions = np.flatnonzero((heads == entity_idx) | (tails == entity_idx))
+    elif entity_idx < len(adjacency[1]) - 1:
+        out_order, out_ptr, in_order, in_ptr = adjacency
+        positions = np.union1d(
+            out_order[out_ptr[entity_idx]:out_ptr[entity_idx + 1]],
+            in_order[in_ptr[entity_idx]:in_ptr[entity_idx + 1]],
+        )
+    else:
+        positions = np.empty(0, dtype=np.int64)
+    
+    for h, r, t in zip(heads[positions].tolist(), rels[positions].tolist(), tails[positions].tolist()):
         if h == entity_idx:
-            rel = relation_labels.get(r, f"rel_{r}")
-            tail = entity_labels.get(t, f"entity_{t}")
-            outgoing.append(f"{rel} → {tail}")
+            outgoing.append(f"{relation_labels[r]} → {entity_labels[t]}")
         elif t == entity_idx:
-            rel = relation_labels.get(r, f"rel_{r}")
-            head = entity_labels.get(h, f"entity_{h}")
-            incoming.append(f"{head} → {rel}")
+            incoming.append(f"{entity_labels[h]} → {relation_labels[r]}")
     
-    entity_name = entity_labels.get(entity_idx, f"entity_{entity_idx}")
+    entity_name = entity_labels[entity_idx]
     context_parts = [f"Entity: {entity_name}"]
     
     if outgoing:
@@ -208,52 +366,192 @@ def summarize_node(node: Dict[str, str], contexts: List[str]) -> str:
     return " | ".join(parts)
 
 
-def find_similar_entities(query_text: str, entity_embeddings: np.ndarray,
-                         entity_labels: Dict[int, str], top_k: int = TOP_K) -> List[Tuple[int, float]]:
-    """Find entities with labels similar to query text."""
-    # Simple text matching for now - could be enhanced with sentence embeddings
+def build_label_index(entity_labels: Dict[int, str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+    """Precompute the lowercased label arrays used by find_similar_entities.
+
+    Returns (entity indices, lowercased labels, distinct-word count per label,
+    word -> positions of the labels containing it).
+    """
+    indices = np.fromiter(entity_labels.keys(), dtype=np.int64, count=len(entity_labels))
+    labels_lower = [label.lower() for label in entity_labels.values()]
+    word_counts = np.zeros(len(labels_lower), dtype=np.int64)
+    postings: Dict[str, List[int]] = {}
+    for pos, label_lower in enumerate(labels_lower):
+        words = set(label_lower.split())
+        word_counts[pos] = len(words)
+        for word in words:
+            postings.setdefault(word, []).append(pos)
+    word_postings = {word: np.asarray(positions, dtype=np.int64) for word, positions in postings.items()}
+    return indices, np.array(labels_lower, dtype=str), word_counts, word_postings
+
+
+def match_entity_labels(query_text: str, entity_labels: Dict[int, str], top_k: int = TOP_K,
+                        label_index: Tuple | None = None) -> List[Tuple[int, float]]:
+    """Find entities with labels similar to query text.
+
+    Pass the result of build_label_index(entity_labels) as label_index to
+    avoid rebuilding it on every call.
+    """
+    indices, labels_lower, word_counts, word_postings = label_index or build_label_index(entity_labels)
+    if not len(indices):
+        return []
     query_lower = query_text.lower()
     
-    # Score entities by label similarity
-    scores = []
-    for idx, label in entity_labels.items():
-        label_lower = label.lower()
-        
-        # Exact match
-        if query_lower == label_lower:
-            scores.append((idx, 1.0))
-        # Contains query
-        elif query_lower in label_lower:
-            scores.append((idx, 0.8))
-        # Query contains label
-        elif label_lower in query_lower:
-            scores.append((idx, 0.6))
-        # Partial word match
-        else:
-            query_words = set(query_lower.split())
-            label_words = set(label_lower.split())
-            overlap = len(query_words & label_words)
-            if overlap > 0:
-                scores.append((idx, 0.4 * overlap / max(len(query_words), len(label_words))))
+    # Partial word match: 0.4 * shared distinct words / larger word count
+    query_words = set(query_lower.split())
+    overlap = np.zeros(len(indices), dtype=np.int64)
+    for word in query_words:
+        positions = word_postings.get(word)
+        if positions is not None:
+            overlap[positions] += 1
+    scores = 0.4 * overlap / np.maximum(np.maximum(word_counts, len(query_words)), 1)
+    
+    # Stronger matches override in increasing order of priority
+    scores = np.where(np.char.find(query_lower, labels_lower) >= 0, 0.6, scores)  # query contains label
+    scores = np.where(np.char.find(labels_lower, query_lower) >= 0, 0.8, scores)  # contains query
+    scores = np.where(labels_lower == query_lower, 1.0, scores)  # exact match
+    
+    # Top_k by score; ties keep label-map order
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > top_k:
+        kth = np.partition(scores[candidates], len(candidates) - top_k)[len(candidates) - top_k]
+        candidates = candidates[scores[candidates] >= kth]
+    top = candidates[np.argsort(-scores[candidates], kind="stable")[:top_k]]
+    return [(int(indices[pos]), float(scores[pos])) for pos in top]
+
+
+def normalize_rows(embeddings: np.ndarray) -> np.ndarray:
+    """Return a float32 copy of embeddings with L2-normalised rows."""
+    normed = np.array(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(normed, axis=1, keepdims=True)
+    normed /= np.maximum(norms, 1e-12)
+    return normed
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _dot_scores_numba(E, q):
+        scores = np.empty(E.shape[0], np.float32)
+        for i in prange(E.shape[0]):
+            s = np.float32(0.0)
+            for d in range(E.shape[1]):
+                s += E[i, d] * q[d]
+            scores[i] = s
+        return scores
+else:
+    _dot_scores_numba = None
+
+
+def cosine_scores(query_vec: np.ndarray, normed_embeddings: np.ndarray) -> np.ndarray:
+    """Cosine similarity of query_vec against rows of an L2-normalised matrix.
+
+    Uses simsimd when installed, else a Numba kernel, else a NumPy matmul.
+    """
+    query_vec = np.ascontiguousarray(query_vec, dtype=np.float32)
+    if simsimd is not None:
+        return 1.0 - np.asarray(simsimd.cdist(query_vec[None, :], normed_embeddings, metric="cosine"))[0]
+    query_vec = query_vec / max(float(np.linalg.norm(query_vec)), 1e-12)
+    if _dot_scores_numba is not None:
+        return _dot_scores_numba(normed_embeddings, query_vec)
+    return normed_embeddings @ query_vec
+
+
+def quantize_rows_int8(embeddings: np.ndarray) -> np.ndarray:
+    """Symmetric per-row int8 quantisation; row directions (and so cosines) are kept."""
+    embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    scales = np.abs(embeddings).max(axis=1, keepdims=True) / 127.0
+    return np.round(embeddings / np.maximum(scales, 1e-12)).astype(np.int8)
+
+
+def cosine_scores_int8(query_vec: np.ndarray, quantized_embeddings: np.ndarray) -> np.ndarray:
+    """Cosine similarity of query_vec against int8 rows using simsimd's integer kernels."""
+    query_i8 = quantize_rows_int8(query_vec)
+    return 1.0 - np.asarray(simsimd.cdist(query_i8, quantized_embeddings, metric="cosine"))[0]
+
+
+def find_similar_entities(query_text: str, entity_embeddings: np.ndarray,
+                         entity_labels: Dict[int, str], top_k: int = TOP_K,
+                         label_index: Tuple | None = None,
+                         quantized_embeddings: np.ndarray | None = None) -> List[Tuple[int, float]]:
+    """Find entities matching query text, topped up from TransE embedding space.
+
+    Label matches (see match_entity_labels) always come first, with their
+    label scores. Only when there are fewer than top_k of them are the
+    remaining slots filled by cosine similarity to the score-weighted mean
+    of the best SEED_K matches; those entries carry their cosine score.
+    entity_embeddings must have L2-normalised rows (see normalize_rows).
+    If quantized_embeddings (from quantize_rows_int8) is given, the scan
+    runs over it instead and scores are approximate.
+    """
+    matches = match_entity_labels(query_text, entity_labels, top_k=max(top_k, SEED_K), label_index=label_index)
+    results = matches[:top_k]
+    if not matches or len(results) >= top_k:
+        return results
+    seeds = matches[:SEED_K]
+    seed_idx = np.array([idx for idx, _ in seeds])
+    seed_weights = np.array([score for _, score in seeds], dtype=np.float32)
+    query_vec = seed_weights @ entity_embeddings[seed_idx]
     
-    # Sort by score and return top_k
-    scores.sort(key=lambda x: x[1], reverse=True)
-    return scores[:top_k]
+    if quantized_embeddings is not None and simsimd is not None:
+        scores = cosine_scores_int8(query_vec, quantized_embeddings)
+    else:
+        scores = cosine_scores(query_vec, entity_embeddings)
+    scores = np.array(scores, dtype=np.float32)
+    scores[[idx for idx, _ in results]] = -np.inf  # already returned as label matches
+    fill_k = min(top_k - len(results), len(scores) - len(results))
+    if fill_k <= 0:
+        return results
+    top = np.argpartition(-scores, fill_k - 1)[:fill_k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return results + [(int(idx), float(scores[idx])) for idx in top]
+
+
+def _normalize_id(text: str) -> str:
+    return text.lower().replace("_", "").replace("-", "")
+
+
+def build_entity_id_index(entity_labels: Dict[int, str],
+                          entity_uris: Dict[int, str]) -> Tuple[Dict[str, int], Dict[str, int], Dict[str, int]]:
+    """Normalised-URI, URI-suffix and normalised-label lookups for find_entity_by_id.
+
+    The first entity wins when several share a key, as in the linear scan.
+    """
+    by_uri: Dict[str, int] = {}
+    by_suffix: Dict[str, int] = {}
+    by_label: Dict[str, int] = {}
+    for idx, uri in entity_uris.items():
+        by_uri.setdefault(_normalize_id(uri), idx)
+        by_suffix.setdefault(_normalize_id(uri.rstrip("/").rsplit("/", 1)[-1]), idx)
+    for idx, label in entity_labels.items():
+        by_label.setdefault(_normalize_id(label), idx)
+    return by_uri, by_suffix, by_label
 
 
 def find_entity_by_id(node_id: str, entity_labels: Dict[int, str], 
-                     entity_uris: Dict[int, str]) -> int | None:
-    """Find entity index by node ID from JSON."""
-    node_id_clean = node_id.lower().replace("_", "").replace("-", "")
+                     entity_uris: Dict[int, str],
+                     id_index: Tuple[Dict[str, int], Dict[str, int], Dict[str, int]] | None = None) -> int | None:
+    """Find entity index by node ID from JSON.
+
+    With id_index from build_entity_id_index, exact matches on the full
+    URI, the URI's last path segment or the label are answered by hash
+    lookup; the substring scans below only run when those miss.
+    """
+    node_id_clean = _normalize_id(node_id)
+    
+    if id_index is not None:
+        for lookup in id_index:
+            idx = lookup.get(node_id_clean)
+            if idx is not None:
+                return idx
     
     for idx, uri in entity_uris.items():
-        uri_clean = uri.lower().replace("_", "").replace("-", "")
+        uri_clean = _normalize_id(uri)
         if node_id in uri or node_id_clean in uri_clean:
             return idx
     
     # Try matching by label
     for idx, label in entity_labels.items():
-        label_clean = label.lower().replace("_", "").replace("-", "")
+        label_clean = _normalize_id(label)
         if node_id_clean in label_clean:
             return idx
     
@@ -312,17 +610,49 @@ class KGRAG:
         self.entity_embeddings, self.relation_embeddings = load_embeddings()
         self.entity_idx_to_uri, self.entity_uri_to_idx, self.entity_idx_to_label = load_entity_map()
         self.relation_idx_to_uri, self.relation_idx_to_label = load_relation_map()
-        self.triples = load_triples()
+        self.heads, self.rels, self.tails = load_triples()
+        self._label_index = build_label_index(self.entity_idx_to_label)
+        self._entity_id_index = build_entity_id_index(self.entity_idx_to_label, self.entity_idx_to_uri)
+        self._lower_label_to_idx: Dict[str, List[int]] = {}  # entities sharing a lowercased label, in map order
+        for idx, label in self.entity_idx_to_label.items():
+            self._lower_label_to_idx.setdefault(label.lower(), []).append(idx)
+        self._adjacency = build_adjacency(self.heads, self.tails, len(self.entity_idx_to_label))
+        # Dense id -> label arrays covering every id used by the triples
+        self.entity_labels_arr = build_label_array(self.entity_idx_to_label, "entity", len(self._adjacency[1]) - 1)
+        self.relation_labels_arr = build_label_array(
+            self.relation_idx_to_label, "rel", int(self.rels.max(initial=-1)) + 1
+        )
+        # Query-independent tail of every KG context prompt
+        self._rel_freq_block = "\nKey relationship patterns found:" + "".join(
+            f"\n  • {rel} (appears {count} times)" for rel, count in self._count_top_relations()
+        )
+        # Contexts depend only on the loaded KG, so memoize them per instance
+        self._entity_context = functools.lru_cache(maxsize=1024)(self._entity_context)
+        self._kg_context_for = functools.lru_cache(maxsize=1024)(self._kg_context_for)
         
-        # Reshape embeddings
         num_entities = len(self.entity_idx_to_label)
         num_relations = len(self.relation_idx_to_label)
-        self.entity_embeddings = self.entity_embeddings.reshape(num_entities, EMBEDDING_DIM)
-        self.relation_embeddings = self.relation_embeddings.reshape(num_relations, EMBEDDING_DIM)
+        if self.entity_embeddings.shape[0] != num_entities or self.relation_embeddings.shape[0] != num_relations:
+            raise ValueError(
+                f"Embedding rows ({self.entity_embeddings.shape[0]}, {self.relation_embeddings.shape[0]}) "
+                f"do not match the maps ({num_entities} entities, {num_relations} relations)"
+            )
+        # Unit rows so cosine search reduces to a dot product (the one in-memory copy)
+        self.entity_embeddings = normalize_rows(self.entity_embeddings)
+        # A quarter of the bytes per scan; only simsimd has int8 cosine kernels
+        self.entity_embeddings_i8 = (
+            quantize_rows_int8(self.entity_embeddings) if INT8_SEARCH and simsimd is not None else None
+        )
+        if simsimd is None and _dot_scores_numba is not None and len(self.entity_embeddings):
+            # Compile the Numba kernel now rather than on the first query
+            cosine_scores(self.entity_embeddings[0], self.entity_embeddings)
         
-        print(f"Loaded {num_entities} entities, {num_relations} relations, {len(self.triples)} triples")
+        print(f"Loaded {num_entities} entities, {num_relations} relations, {len(self.heads)} triples")
         
         self.current_json_nodes = []
+        self._json_node_search: List[Tuple[str, str, str]] = []  # lowercased (id, label, name) per node
+        self._node_emb: np.ndarray | None = None  # embedded node summaries, one row per JSON node
+        self._embedding_memo: Dict[str, np.ndarray] = {}
         self.current_kg_data = None  # ✅ Track the actual KG data
         self.glossary_text = self._load_glossary()
         
@@ -333,6 +663,76 @@ class KGRAG:
             print("✓ LLM API is available")
         else:
             print("⚠ No LLM API available, will use deterministic responses only")
+        
+        self._glossary_lines = list(dict.fromkeys(
+            line.strip() for line in self.glossary_text.splitlines()
+            if line.strip() and not line.lstrip().startswith("#")
+        ))
+        self._glossary_emb = self._embed_texts(self._glossary_lines) if self.llm_available else None
+        if self._glossary_emb is not None:
+            print(f"Indexed {len(self._glossary_lines)} glossary lines")
+
+    def _embed_texts(self, texts: List[str]) -> np.ndarray | None:
+        """L2-normalised embeddings for texts, one row each; None if unavailable.
+
+        Hits come from memory or the on-disk cache; misses are sent to Ollama
+        in EMBED_BATCH_SIZE chunks. Each chunk is cached as soon as it arrives,
+        so a failed or timed-out run keeps its progress for the next one.
+        """
+        if not texts:
+            return None
+        vectors: Dict[str, np.ndarray] = {}
+        misses = []
+        for text in dict.fromkeys(texts):
+            vec = self._embedding_memo.get(text)
+            if vec is None and LLM_CACHE_ENABLED:
+                try:
+                    vec = np.load(_embedding_cache_path(text), allow_pickle=False)
+                except (OSError, ValueError):
+                    vec = None
+            if vec is None:
+                misses.append(text)
+            else:
+                vectors[text] = vec
+        
+        for start in range(0, len(misses), EMBED_BATCH_SIZE):
+            chunk = misses[start:start + EMBED_BATCH_SIZE]
+            try:
+                response = _SESSION.post(
+                    OLLAMA_EMBED_URL, json={"model": OLLAMA_EMBED_MODEL, "input": chunk}, timeout=30
+                )
+                embeddings = response.json().get("embeddings") if response.status_code == 200 else None
+            except Exception as e:
+                print(f"[KGRAG] Ollama embedding request failed: {e}")
+                embeddings = None
+            if not embeddings or len(embeddings) != len(chunk):
+                # Give up on the rest rather than waiting out every chunk's timeout
+                break
+            for text, vec in zip(chunk, normalize_rows(np.asarray(embeddings, dtype=np.float32))):
+                vectors[text] = vec
+                if LLM_CACHE_ENABLED:
+                    try:
+                        EMBEDDING_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                        np.save(_embedding_cache_path(text), vec, allow_pickle=False)
+                    except OSError as e:
+                        print(f"[KGRAG] Could not write embedding cache: {e}")
+        
+        self._embedding_memo.update(vectors)
+        if len(vectors) < len(dict.fromkeys(texts)):
+            return None
+        return np.stack([vectors[text] for text in texts])
+
+    def _glossary_hints(self, text: str) -> List[str]:
+        """Glossary lines most similar to text, best first."""
+        if self._glossary_emb is None:
+            return []
+        query = self._embed_texts([text])
+        if query is None:
+            return []
+        scores = self._glossary_emb @ query[0]
+        top_k = min(GLOSSARY_HINTS, len(scores))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        return [self._glossary_lines[i] for i in top[np.argsort(-scores[top])]]
 
     def _load_glossary(self) -> str:
         if GLOSSARY_FILE.exists():
@@ -352,7 +752,7 @@ class KGRAG:
         # Try Ollama with detected host
         try:
             print(f"  Checking Ollama at {OLLAMA_HOST}:11434...")
-            response = requests.get(f"http://{OLLAMA_HOST}:11434/api/tags", timeout=3)
+            response = _SESSION.get(f"http://{OLLAMA_HOST}:11434/api/tags", timeout=3)
             if response.status_code == 200:
                 models = response.json().get("models", [])
                 model_names = [m.get("name", "") for m in models]
@@ -367,7 +767,7 @@ class KGRAG:
                 print("  Checking HuggingFace API...")
                 headers = {"Content-Type": "application/json"}
                 headers["Authorization"] = f"Bearer {HF_API_TOKEN}"
-                response = requests.post(HF_API_URL, headers=headers, json={"inputs": "test"}, timeout=5)
+                response = _SESSION.post(HF_API_URL, headers=headers, json={"inputs": "test"}, timeout=5)
                 if response.status_code in [200, 503]:
                     print("  ✓ HuggingFace API available")
                     return True
@@ -376,12 +776,25 @@ class KGRAG:
         
         return False
     
+    def find_entity_by_id(self, node_id: str) -> int | None:
+        """Find the KG entity index for a JSON node ID."""
+        return find_entity_by_id(node_id, self.entity_idx_to_label, self.entity_idx_to_uri, self._entity_id_index)
+
     def load_json_data(self, boxology_data: Dict):
         """Load KG data directly from dictionary."""
         print(f"\nLoading KG data from dictionary...")
         self.current_kg_data = boxology_data  # ✅ Store the data
         self.current_json_nodes = extract_json_nodes(boxology_data)
+        self._json_node_search = [
+            tuple(str(node.get(key) or "").lower() for key in ("id", "label", "name"))
+            for node in self.current_json_nodes
+        ]
         print(f"Extracted {len(self.current_json_nodes)} nodes from KG data")
+        # Embed every node summary up front; generate_answer reuses them for glossary hints
+        self._node_emb = (
+            self._embed_texts([self._node_summary(node) for node in self.current_json_nodes])
+            if self.llm_available else None
+        )
         
         print("\nAvailable nodes:")
         for i, node in enumerate(self.current_json_nodes[:10], 1):
@@ -414,89 +827,141 @@ class KGRAG:
         
         return self.describe_node(node_label or node_id)
 
-    def describe_node(self, query: str) -> str:
-        """Describe a node based on KG knowledge."""
-        matching_json_nodes = []
+    def _match_node(self, query: str) -> Tuple[Dict | None, List[str]]:
+        """Find the JSON node best matching query and KG contexts for it."""
         query_lower = query.lower()
+        nodes_search = list(zip(self.current_json_nodes, self._json_node_search))
         
-        for node in self.current_json_nodes:
-            node_id = node.get("id", "").lower()
-            node_label = node.get("label", "").lower()
-            node_name = node.get("name", "").lower()
-            
-            if query_lower in node_id or query_lower in node_label or query_lower in node_name:
-                matching_json_nodes.append(node)
+        # Only the first match is used, so stop at it
+        best_node = next(
+            (node for node, fields in nodes_search if any(query_lower in field for field in fields)),
+            None
+        )
+        
+        if best_node is None:
+            query_words = query_lower.split()
+            best_node = next(
+                (node for node, (_, node_label, _) in nodes_search if any(word in node_label for word in query_words)),
+                None
+            )
         
-        if not matching_json_nodes:
-            for node in self.current_json_nodes:
-                node_label = node.get("label", "").lower()
-                if any(word in node_label for word in query_lower.split()):
-                    matching_json_nodes.append(node)
+        if best_node is None and self._node_emb is not None:
+            # Last resort: closest node summary in embedding space
+            query_emb = self._embed_texts([query])
+            if query_emb is not None:
+                scores = self._node_emb @ query_emb[0]
+                best = int(np.argmax(scores))
+                if scores[best] >= NODE_MATCH_MIN_SIMILARITY:
+                    best_node = self.current_json_nodes[best]
         
         contexts = []
-        best_node = None
         
-        if matching_json_nodes:
-            best_node = matching_json_nodes[0]
-            
+        if best_node:
             # Build simple context for LLM
             search_text = f"{best_node['label']} {best_node['name']}"
             similar = find_similar_entities(
                 search_text,
                 self.entity_embeddings,
                 self.entity_idx_to_label,
-                top_k=3
+                top_k=3,
+                label_index=self._label_index,
+                quantized_embeddings=self.entity_embeddings_i8
             )
             
             for entity_idx, score in similar:
-                context = build_entity_context(
-                    entity_idx, self.triples,
-                    self.entity_idx_to_label,
-                    self.relation_idx_to_label
-                )
-                contexts.append(context)
+                contexts.append(self._entity_context(entity_idx))
+        
+        return best_node, contexts
+
+    def _entity_context(self, entity_idx: int) -> str:
+        return build_entity_context(
+            entity_idx, self.heads, self.rels, self.tails,
+            self.entity_labels_arr,
+            self.relation_labels_arr,
+            adjacency=self._adjacency
+        )
+
+    @staticmethod
+    def _node_summary(node: Dict) -> str:
+        return f"{node['label']} (Type: {node['name']})"
+
+    def _glossary_section(self, summary: str) -> str:
+        hints = self._glossary_hints(summary)
+        if not hints:
+            return ""
+        return "Related glossary entries:\n" + "\n".join(f"- {hint}" for hint in hints) + "\n\n"
+
+    @staticmethod
+    def _format_description(node: Dict, llm_answer: str) -> str:
+        output = f"**{node['label']}**\n\n"
+        output += f"**Type:** {node['name']}\n"
+        output += f"**Pattern:** {node['pattern']}\n\n"
+        output += f"**Description:**\n{llm_answer}"
+        return output
+
+    def describe_node(self, query: str) -> str:
+        """Describe a node based on KG knowledge."""
+        best_node, contexts = self._match_node(query)
         
         # Generate clean output
         if best_node:
-            summary_text = f"{best_node['label']} (Type: {best_node['name']})"
-            llm_answer = self.generate_answer(best_node['label'], contexts, summary_text)
-            
-            output = f"**{best_node['label']}**\n\n"
-            output += f"**Type:** {best_node['name']}\n"
-            output += f"**Pattern:** {best_node['pattern']}\n\n"
-            output += f"**Description:**\n{llm_answer}"
-            
-            return output
+            llm_answer = self.generate_answer(best_node['label'], contexts, self._node_summary(best_node))
+            return self._format_description(best_node, llm_answer)
         else:
             return f"No information found for '{query}'"
 
-    def generate_answer(self, query: str, contexts: List[str], summary: str) -> str:
-        """Generate answer using LLM based on KG structure."""
-        if not self.llm_available:
-            return "LLM not available. This node is part of the knowledge graph representing a component in the boxology design pattern."
-        
-        kg_context = self._build_kg_context(contexts)
-        
-        prompt = (
-            "You are an AI assistant analyzing a boxology knowledge graph node.\n"
-            f"Node: {summary}\n\n"
-            "Context from knowledge graph:\n" + kg_context + "\n\n"
-            "Consider other nodes in neighbor and explain how those effect on eachother.\n\n"
-            "Consider the role of each node as boxology, process, input, output, model or pattern.\n"
-            "Provide a brief, clear explanation (2-3 sentences) of what this node represents and its role in the system. "
-            "Focus on practical meaning, not technical IDs.\n\n"
-            "Answer:"
-        )
+    def describe_nodes_batch(self, queries: List[str]) -> List[str]:
+        """Describe several nodes at once, sharing a single LLM prompt.
+
+        Returns one description per query, in order. Nodes the batched answer
+        does not cover fall back to an individual generate_answer call.
+        """
+        matches = [self._match_node(q) for q in queries]
+        found = [i for i, (node, _) in enumerate(matches) if node]
+        answers: Dict[int, str] = {}
+        if len(found) > 1 and self.llm_available:
+            batch_answers = self._generate_answers_batch([matches[i] for i in found])
+            answers = {found[j]: a for j, a in batch_answers.items()}
         
+        results = []
+        for i, query in enumerate(queries):
+            node, contexts = matches[i]
+            if not node:
+                results.append(f"No information found for '{query}'")
+                continue
+            answer = answers.get(i) or self.generate_answer(node['label'], contexts, self._node_summary(node))
+            results.append(self._format_description(node, answer))
+        return results
+
+    def _call_llm(self, prompt: str, max_new_tokens: int = MAX_NEW_TOKENS) -> str | None:
+        """Answer a prompt from the on-disk cache, or ask the LLM and cache the reply."""
+        cached = _read_llm_cache(prompt, max_new_tokens)
+        if cached is not None:
+            return cached
+        answer = self._request_llm(prompt, max_new_tokens)
+        if answer is not None:
+            _write_llm_cache(prompt, max_new_tokens, answer)
+        return answer
+
+    def _request_llm(self, prompt: str, max_new_tokens: int) -> str | None:
+        """Send a prompt to Ollama, falling back to HuggingFace. None if both fail."""
         # Try Ollama FIRST
+        answer = self._request_ollama(prompt, max_new_tokens)
+        if answer:
+            return answer
+        
+        # Try HuggingFace as fallback
+        return self._request_hf(prompt, max_new_tokens)
+
+    def _request_ollama(self, prompt: str, max_new_tokens: int) -> str | None:
         try:
             payload = {
                 "model": OLLAMA_MODEL,
                 "prompt": prompt,
                 "stream": False,
-                "options": {"temperature": TEMPERATURE, "num_predict": MAX_NEW_TOKENS}
+                "options": {"temperature": TEMPERATURE, "num_predict": max_new_tokens}
             }
-            response = requests.post(OLLAMA_API_URL, json=payload, timeout=30)
+            response = _SESSION.post(OLLAMA_API_URL, json=payload, timeout=30)
             if response.status_code == 200:
                 result = response.json()
                 answer = result.get("response", "").strip()
@@ -504,18 +969,19 @@ class KGRAG:
                     return answer
         except Exception as e:
             print(f"[KGRAG] Ollama request failed: {e}")
-        
-        # Try HuggingFace as fallback
+        return None
+
+    def _request_hf(self, prompt: str, max_new_tokens: int) -> str | None:
         try:
-            headers = {"Content-Type": "application/json"}
+            headers = {}
             if HF_API_TOKEN:
                 headers["Authorization"] = f"Bearer {HF_API_TOKEN}"
             
             payload = {
                 "inputs": prompt,
-                "parameters": {"max_new_tokens": MAX_NEW_TOKENS, "temperature": TEMPERATURE}
+                "parameters": {"max_new_tokens": max_new_tokens, "temperature": TEMPERATURE}
             }
-            response = requests.post(HF_API_URL, headers=headers, json=payload, timeout=30)
+            response = _SESSION.post(HF_API_URL, headers=headers, json=payload, timeout=30)
             if response.status_code == 200:
                 result = response.json()
                 if isinstance(result, list) and len(result) > 0:
@@ -525,15 +991,133 @@ class KGRAG:
                     return answer if answer else "(Empty LLM response)"
         except Exception as e:
             print(f"[KGRAG] HuggingFace request failed: {e}")
+        return None
+
+    def _stream_llm(self, prompt: str, max_new_tokens: int = MAX_NEW_TOKENS) -> Iterator[str]:
+        """Yield answer text as Ollama generates it.
+
+        Cached answers and the HuggingFace fallback arrive as a single chunk.
+        Yields nothing if every backend fails.
+        """
+        cached = _read_llm_cache(prompt, max_new_tokens)
+        if cached is not None:
+            yield cached
+            return
+        
+        parts = []
+        done = False
+        try:
+            payload = {
+                "model": OLLAMA_MODEL,
+                "prompt": prompt,
+                "stream": True,
+                "options": {"temperature": TEMPERATURE, "num_predict": max_new_tokens}
+            }
+            with _SESSION.post(OLLAMA_API_URL, json=payload, stream=True, timeout=60) as response:
+                if response.status_code == 200:
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        token = chunk.get("response", "")
+                        if token:
+                            if not parts:
+                                token = token.lstrip()
+                            parts.append(token)
+                            yield token
+                        if chunk.get("done"):
+                            done = True
+                            break
+        except Exception as e:
+            print(f"[KGRAG] Ollama request failed: {e}")
+        
+        answer = "".join(parts).strip()
+        if answer:
+            # Only complete generations are cached; a stream cut short is not
+            if done:
+                _write_llm_cache(prompt, max_new_tokens, answer)
+            return
+        
+        answer = self._request_hf(prompt, max_new_tokens)
+        if answer is not None:
+            _write_llm_cache(prompt, max_new_tokens, answer)
+            yield answer
+
+    def generate_answer_stream(self, query: str, contexts: List[str], summary: str) -> Iterator[str]:
+        """Generate answer using LLM based on KG structure, yielding text as it arrives."""
+        if not self.llm_available:
+            yield "LLM not available. This node is part of the knowledge graph representing a component in the boxology design pattern."
+            return
+        
+        kg_context = self._build_kg_context(contexts)
+        
+        prompt = (
+            "You are an AI assistant analyzing a boxology knowledge graph node.\n"
+            f"Node: {summary}\n\n"
+            "Context from knowledge graph:\n" + kg_context + "\n\n"
+            + self._glossary_section(summary) +
+            "Consider other nodes in neighbor and explain how those effect on eachother.\n\n"
+            "Consider the role of each node as boxology, process, input, output, model or pattern.\n"
+            "Provide a brief, clear explanation (2-3 sentences) of what this node represents and its role in the system. "
+            "Focus on practical meaning, not technical IDs.\n\n"
+            "Answer:"
+        )
         
-        return "(LLM request failed - please install Ollama: https://ollama.com/download/windows)"
+        produced = False
+        for chunk in self._stream_llm(prompt):
+            produced = True
+            yield chunk
+        if not produced:
+            yield "(LLM request failed - please install Ollama: https://ollama.com/download/windows)"
+
+    def generate_answer(self, query: str, contexts: List[str], summary: str) -> str:
+        """Generate answer using LLM based on KG structure."""
+        return "".join(self.generate_answer_stream(query, contexts, summary)).strip()
+
+    def _generate_answers_batch(self, items: List[Tuple[Dict, List[str]]]) -> Dict[int, str]:
+        """One LLM call for several (node, contexts) pairs; returns {position: answer}."""
+        sections = []
+        for n, (node, contexts) in enumerate(items, 1):
+            summary = self._node_summary(node)
+            glossary = self._glossary_section(summary)
+            sections.append(
+                f"Node {n}: {summary}\n"
+                "Context from knowledge graph:\n" + self._build_kg_context(contexts)
+                + ("\n\n" + glossary.rstrip() if glossary else "")
+            )
+        prompt = (
+            "You are an AI assistant analyzing boxology knowledge graph nodes.\n\n"
+            + "\n\n".join(sections) + "\n\n"
+            "For each node, consider its neighbors and how they affect each other, and its role "
+            "as boxology, process, input, output, model or pattern.\n"
+            "Provide a brief, clear explanation (2-3 sentences) per node of what it represents and its role in the system. "
+            "Focus on practical meaning, not technical IDs.\n"
+            'Return strict JSON mapping node numbers to explanations: {"1": "...", "2": "..."}. No prose.\n\n'
+            "Answer:"
+        )
+        raw = self._call_llm(prompt, max_new_tokens=MAX_NEW_TOKENS * len(items))
+        if not raw:
+            return {}
+        i, j = raw.find("{"), raw.rfind("}")
+        try:
+            data = json.loads(raw[i:j + 1]) if i != -1 and j > i else {}
+        except ValueError:
+            return {}
+        answers = {}
+        for key, value in data.items() if isinstance(data, dict) else ():
+            if str(key).isdigit() and 1 <= int(key) <= len(items) and isinstance(value, str) and value.strip():
+                answers[int(key) - 1] = value.strip()
+        return answers
     
     def _build_kg_context(self, contexts: List[str]) -> str:
         """Build rich KG context showing entity relationships."""
+        return self._kg_context_for(tuple(contexts[:5]))
+
+    def _kg_context_for(self, contexts: Tuple[str, ...]) -> str:
         context_lines = []
         seen_entities = set()
         
-        for context_str in contexts[:5]:
+        for context_str in contexts:
             context_lines.append(f"• {context_str}")
             
             parts = context_str.split("|")
@@ -541,39 +1125,46 @@ class KGRAG:
                 if "Entity:" in part:
                     entity_label = part.split("Entity:")[-1].strip()
                     
-                    for idx, label in self.entity_idx_to_label.items():
-                        if label.lower() == entity_label.lower() and idx not in seen_entities:
+                    for idx in self._lower_label_to_idx.get(entity_label.lower(), ()):
+                        if idx not in seen_entities:
                             seen_entities.add(idx)
                             neighbors = self._get_entity_neighbors(idx)
                             if neighbors:
                                 context_lines.append(f"  Related to: {neighbors}")
                             break
         
-        context_lines.append("\nKey relationship patterns found:")
-        rel_counts = {}
-        for _, r, _ in self.triples[:100]:
-            rel = self.relation_idx_to_label.get(r, f"rel_{r}")
-            rel_counts[rel] = rel_counts.get(rel, 0) + 1
-        
-        for rel, count in sorted(rel_counts.items(), key=lambda x: x[1], reverse=True)[:5]:
-            context_lines.append(f"  • {rel} (appears {count} times)")
-        
+        context_lines.append(self._rel_freq_block)
         return "\n".join(context_lines)
+
+    def _count_top_relations(self, top_n: int = 5) -> List[Tuple[str, int]]:
+        """Most frequent relations among the leading triples, ties in order of first use."""
+        sample = self.rels[:RELATION_PATTERN_SAMPLE]
+        if not len(sample):
+            return []
+        counts = np.bincount(sample)
+        rel_ids, first_seen = np.unique(sample, return_index=True)
+        order = np.lexsort((first_seen, -counts[rel_ids]))[:top_n]
+        return [
+            (self.relation_labels_arr[r], int(counts[r]))
+            for r in rel_ids[order]
+        ]
     
     def _get_entity_neighbors(self, entity_idx: int, max_neighbors: int = 3) -> str:
         """Get neighbor entities and relationships."""
-        neighbors = []
-        
-        for h, r, t in self.triples:
-            if h == entity_idx:
-                rel = self.relation_idx_to_label.get(r, f"rel_{r}")
-                tail = self.entity_idx_to_label.get(t, f"entity_{t}")
-                neighbors.append(f"{rel}→{tail}")
+        out_order, out_ptr, in_order, in_ptr = self._adjacency
+        if entity_idx >= len(out_ptr) - 1:
+            return "(no direct neighbors)"
         
-        for h, r, t in self.triples:
-            if t == entity_idx:
-                rel = self.relation_idx_to_label.get(r, f"rel_{r}")
-                head = self.entity_idx_to_label.get(h, f"entity_{h}")
-                neighbors.append(f"{head}→{rel}")
+        # Outgoing first, then incoming; stop as soon as max_neighbors are found
+        out_positions = out_order[out_ptr[entity_idx]:out_ptr[entity_idx + 1]][:max_neighbors]
+        in_positions = in_order[in_ptr[entity_idx]:in_ptr[entity_idx + 1]][:max_neighbors - len(out_positions)]
+        neighbors = [
+            f"{self.relation_labels_arr[r]}→{self.entity_labels_arr[t]}"
+            for r, t in zip(self.rels[out_positions].tolist(), self.tails[out_positions].tolist())
+        ]
+        neighbors += [
+            f"{self.entity_labels_arr[h]}→{self.relation_labels_arr[r]}"
+            for h, r in zip(self.heads[in_positions].tolist(), self.rels[in_positions].tolist())
+        ]
         
-        return "; ".join(neighbors[:max_neighbors]) if neighbors else "(no direct neighbors)"
+        return "; ".join(neighbors) if neighbors else "(no direct neighbors)"
@@ -41,7 +41,7 @@ ignore = "yes"
 global blank_message
 blank_message = True
 global knowledge_graph
-knowledge_graph = ""
+knowledge_graph = []
 global general_predicates
 general_predicates = {"http://www.w3.org/2000/01/rdf-schema#subClassOf":"",
 						"http://www.w3.org/2002/07/owl#sameAs":"",
@@ -1105,18 +1105,18 @@ def semantify_json(triples_map, triples_map_list, delimiter, data, iterator):
                                 dictionary_table_update("<" + graph + ">")
                         if duplicate == "yes":
                             if dic_table[predicate + "_" + obj] not in g_triples:
-                                knowledge_graph += rdf_type
+                                knowledge_graph.append(rdf_type)
                                 g_triples.update(
                                     {dic_table[predicate + "_" + obj]: {dic_table[subject] + "_" + dic_table[obj]: ""}})
                                 i += 1
                             elif dic_table[subject] + "_" + dic_table[obj] not in g_triples[
                                 dic_table[predicate + "_" + obj]]:
-                                knowledge_graph += rdf_type
+                                knowledge_graph.append(rdf_type)
                                 g_triples[dic_table[predicate + "_" + obj]].update(
                                     {dic_table[subject] + "_" + dic_table[obj]: ""})
                                 i += 1
                         else:
-                            knowledge_graph += rdf_type
+                            knowledge_graph.append(rdf_type)
                             i += 1
 
         for predicate_object_map in triples_map.predicate_object_maps_list:
@@ -1518,29 +1518,29 @@ def semantify_json(triples_map, triples_map_list, delimiter, data, iterator):
                         if duplicate == "yes":
                             if predicate in general_predicates:
                                 if dic_table[predicate + "_" + predicate_object_map.object_map.value] not in g_triples:
-                                    knowledge_graph += triple
+                                    knowledge_graph.append(triple)
                                     g_triples.update({dic_table[predicate + "_" + predicate_object_map.object_map.value]: {
                                         dic_table[subject] + "_" + dic_table[object]: ""}})
                                     i += 1
                                 elif dic_table[subject] + "_" + dic_table[object] not in g_triples[
                                     dic_table[predicate + "_" + predicate_object_map.object_map.value]]:
-                                    knowledge_graph += triple
+                                    knowledge_graph.append(triple)
                                     g_triples[dic_table[predicate + "_" + predicate_object_map.object_map.value]].update(
                                         {dic_table[subject] + "_" + dic_table[object]: ""})
                                     i += 1
                             else:
                                 if dic_table[predicate] not in g_triples:
-                                    knowledge_graph += triple
+                                    knowledge_graph.append(triple)
                                     g_triples.update(
                                         {dic_table[predicate]: {dic_table[subject] + "_" + dic_table[object]: ""}})
                                     i += 1
                                 elif dic_table[subject] + "_" + dic_table[object] not in g_triples[dic_table[predicate]]:
-                                    knowledge_graph += triple
+                                    knowledge_graph.append(triple)
                                     g_triples[dic_table[predicate]].update(
                                         {dic_table[subject] + "_" + dic_table[object]: ""})
                                     i += 1
                         else:
-                            knowledge_graph += triple
+                            knowledge_graph.append(triple)
                             i += 1
                 if predicate[1:-1] in predicate_object_map.graph:
                     triple = subject + " " + predicate + " " + object + ".\n"
@@ -1559,31 +1559,31 @@ def semantify_json(triples_map, triples_map_list, delimiter, data, iterator):
                         if duplicate == "yes":
                             if predicate in general_predicates:
                                 if dic_table[predicate + "_" + predicate_object_map.object_map.value] not in g_triples:
-                                    knowledge_graph += triple
+                                    knowledge_graph.append(triple)
                                     g_triples.update({dic_table[
                                                           predicate + "_" + predicate_object_map.object_map.value]: {
                                         dic_table[subject] + "_" + dic_table[object]: ""}})
                                     i += 1
                                 elif dic_table[subject] + "_" + dic_table[object] not in g_triples[
                                     predicate + "_" + predicate_object_map.object_map.value]:
-                                    knowledge_graph += triple
+                                    knowledge_graph.append(triple)
                                     g_triples[
                                         dic_table[predicate + "_" + predicate_object_map.object_map.value]].update(
                                         {dic_table[subject] + "_" + dic_table[object]: ""})
                                     i += 1
                             else:
                                 if dic_table[predicate] not in g_triples:
-                                    knowledge_graph += triple
+                                    knowledge_graph.append(triple)
                                     g_triples.update(
                                         {dic_table[predicate]: {dic_table[subject] + "_" + dic_table[object]: ""}})
                                     i += 1
                                 elif dic_table[subject] + "_" + dic_table[object] not in g_triples[dic_table[predicate]]:
-                                    knowledge_graph += triple
+                                    knowledge_graph.append(triple)
                                     g_triples[dic_table[predicate]].update(
                                         {dic_table[subject] + "_" + dic_table[object]: ""})
                                     i += 1
                         else:
-                            knowledge_graph += triple
+                            knowledge_graph.append(triple)
                             i += 1
             elif predicate != None and subject != None and object_list:
                 dictionary_table_update(subject)
@@ -1611,31 +1611,31 @@ def semantify_json(triples_map, triples_map_list, delimiter, data, iterator):
                         if duplicate == "yes":
                             if predicate in general_predicates:
                                 if dic_table[predicate + "_" + predicate_object_map.object_map.value] not in g_triples:
-                                    knowledge_graph += triple
+                                    knowledge_graph.append(triple)
                                     g_triples.update({dic_table[
                                                           predicate + "_" + predicate_object_map.object_map.value]: {
                                         dic_table[subject] + "_" + dic_table[obj]: ""}})
                                     i += 1
                                 elif dic_table[subject] + "_" + dic_table[obj] not in g_triples[
                                     dic_table[predicate + "_" + predicate_object_map.object_map.value]]:
-                                    knowledge_graph += triple
+                                    knowledge_graph.append(triple)
                                     g_triples[
                                         dic_table[predicate + "_" + predicate_object_map.object_map.value]].update(
                                         {dic_table[subject] + "_" + dic_table[obj]: ""})
                                     i += 1
                             else:
                                 if dic_table[predicate] not in g_triples:
-                                    knowledge_graph += triple
+                                    knowledge_graph.append(triple)
                                     g_triples.update(
                                         {dic_table[predicate]: {dic_table[subject] + "_" + dic_table[obj]: ""}})
                                     i += 1
                                 elif dic_table[subject] + "_" + dic_table[obj] not in g_triples[dic_table[predicate]]:
-                                    knowledge_graph += triple
+                                    knowledge_graph.append(triple)
                                     g_triples[dic_table[predicate]].update(
                                         {dic_table[subject] + "_" + dic_table[obj]: ""})
                                     i += 1
                         else:
-                            knowledge_graph += triple
+                            knowledge_graph.append(triple)
                             i += 1
                     if predicate[1:-1] in predicate_object_map.graph:
                         triple = subject + " " + predicate + " " + obj + ".\n"
@@ -1662,39 +1662,39 @@ def semantify_json(triples_map, triples_map_list, delimiter, data, iterator):
                                 if predicate in general_predicates:
                                     if dic_table[
                                         predicate + "_" + predicate_object_map.object_map.value] not in g_triples:
-                                        knowledge_graph += triple
+                                        knowledge_graph.append(triple)
                                         g_triples.update({dic_table[
                                                               predicate + "_" + predicate_object_map.object_map.value]: {
                                             dic_table[subject] + "_" + dic_table[obj]: ""}})
                                         i += 1
                                     elif dic_table[subject] + "_" + dic_table[obj] not in g_triples[
                                         dic_table[predicate + "_" + predicate_object_map.object_map.value]]:
-                                        knowledge_graph += triple
+                                        knowledge_graph.append(triple)
                                         g_triples[
                                             dic_table[predicate + "_" + predicate_object_map.object_map.value]].update(
                                             {dic_table[subject] + "_" + dic_table[obj]: ""})
                                         i += 1
                                     elif new_graph:
-                                        knowledge_graph += triple
+                                        knowledge_graph.append(triple)
                                         i +=1
 
                                 else:
                                     if dic_table[predicate] not in g_triples:
-                                        knowledge_graph += triple
+                                        knowledge_graph.append(triple)
                                         g_triples.update(
                                             {dic_table[predicate]: {dic_table[subject] + "_" + dic_table[obj]: ""}})
                                         i += 1
                                     elif dic_table[subject] + "_" + dic_table[obj] not in g_triples[
                                         dic_table[predicate]]:
-                                        knowledge_graph += triple
+                                        knowledge_graph.append(triple)
                                         g_triples[dic_table[predicate]].update(
                                             {dic_table[subject] + "_" + dic_table[obj]: ""})
                                         i += 1
                                     elif new_graph:
-                                        knowledge_graph += triple
+                                        knowledge_graph.append(triple)
                                         i +=1
                             else:
-                                knowledge_graph += triple
+                                knowledge_graph.append(triple)
                                 i += 1
                 object_list = []
             elif predicate != None and subject_list:
@@ -1721,18 +1721,18 @@ def semantify_json(triples_map, triples_map_list, delimiter, data, iterator):
                                         dictionary_table_update("<" + graph + ">")
                                 if duplicate == "yes":
                                     if dic_table[type_predicate + "_" + obj] not in g_triples:
-                                        knowledge_graph += rdf_type
+                                        knowledge_graph.append(rdf_type)
                                         g_triples.update(
                                             {dic_table[type_predicate + "_" + obj]: {dic_table[subj] + "_" + dic_table[obj]: ""}})
                                         i += 1
                                     elif dic_table[subj] + "_" + dic_table[obj] not in g_triples[
                                         dic_table[type_predicate + "_" + obj]]:
-                                        knowledge_graph += rdf_type
+                                        knowledge_graph.append(rdf_type)
                                         g_triples[dic_table[type_predicate + "_" + obj]].update(
                                             {dic_table[subj] + "_" + dic_table[obj]: ""})
                                         i += 1
                                 else:
-                                    knowledge_graph += rdf_type
+                                    knowledge_graph.append(rdf_type)
                                     i += 1
                     if object != None:
                         dictionary_table_update(object)
@@ -1752,29 +1752,29 @@ def semantify_json(triples_map, triples_map_list, delimiter, data, iterator):
                                 if duplicate == "yes":
                                     if predicate in general_predicates:
                                         if dic_table[predicate + "_" + predicate_object_map.object_map.value] not in g_triples:
-                                            knowledge_graph += triple
+                                            knowledge_graph.append(triple)
                                             g_triples.update({dic_table[predicate + "_" + predicate_object_map.object_map.value]: {
                                                 dic_table[subj] + "_" + dic_table[object]: ""}})
                                             i += 1
                                         elif dic_table[subj] + "_" + dic_table[object] not in g_triples[
                                             dic_table[predicate + "_" + predicate_object_map.object_map.value]]:
-                                            knowledge_graph += triple
+                                            knowledge_graph.append(triple)
                                             g_triples[dic_table[predicate + "_" + predicate_object_map.object_map.value]].update(
                                                 {dic_table[subj] + "_" + dic_table[object]: ""})
                                             i += 1
                                     else:
                                         if dic_table[predicate] not in g_triples:
-                                            knowledge_graph += triple
+                                            knowledge_graph.append(triple)
                                             g_triples.update(
                                                 {dic_table[predicate]: {dic_table[subj] + "_" + dic_table[object]: ""}})
                                             i += 1
                                         elif dic_table[subj] + "_" + dic_table[object] not in g_triples[dic_table[predicate]]:
-                                            knowledge_graph += triple
+                                            knowledge_graph.append(triple)
                                             g_triples[dic_table[predicate]].update(
                                                 {dic_table[subj] + "_" + dic_table[object]: ""})
                                             i += 1
                                 else:
-                                    knowledge_graph += triple
+                                    knowledge_graph.append(triple)
                                     i += 1
                     elif object_list:
                         for obj in object_list:
@@ -1802,31 +1802,31 @@ def semantify_json(triples_map, triples_map_list, delimiter, data, iterator):
                                     if duplicate == "yes":
                                         if predicate in general_predicates:
                                             if dic_table[predicate + "_" + predicate_object_map.object_map.value] not in g_triples:
-                                                knowledge_graph += triple
+                                                knowledge_graph.append(triple)
                                                 g_triples.update({dic_table[
                                                                       predicate + "_" + predicate_object_map.object_map.value]: {
                                                     dic_table[subj] + "_" + dic_table[obj]: ""}})
                                                 i += 1
                                             elif dic_table[subj] + "_" + dic_table[obj] not in g_triples[
                                                 dic_table[predicate + "_" + predicate_object_map.object_map.value]]:
-                                                knowledge_graph += triple
+                                                knowledge_graph.append(triple)
                                                 g_triples[
                                                     dic_table[predicate + "_" + predicate_object_map.object_map.value]].update(
                                                     {dic_table[subj] + "_" + dic_table[obj]: ""})
                                                 i += 1
                                         else:
                                             if dic_table[predicate] not in g_triples:
-                                                knowledge_graph += triple
+                                                knowledge_graph.append(triple)
                                                 g_triples.update(
                                                     {dic_table[predicate]: {dic_table[subj] + "_" + dic_table[obj]: ""}})
                                                 i += 1
                                             elif dic_table[subj] + "_" + dic_table[obj] not in g_triples[dic_table[predicate]]:
-                                                knowledge_graph += triple
+                                                knowledge_graph.append(triple)
                                                 g_triples[dic_table[predicate]].update(
                                                     {dic_table[subj] + "_" + dic_table[obj]: ""})
                                                 i += 1
                                     else:
-                                        knowledge_graph += triple
+                                        knowledge_graph.append(triple)
                                         i += 1
                     else:
                         continue
@@ -1834,10 +1834,24 @@ def semantify_json(triples_map, triples_map_list, delimiter, data, iterator):
                 continue
     return i
 
-def kg_generation(source):
+def kg_statements(source):
+    # Yields the "s p o.\n" statements after each triples map, so callers can
+    # batch them without the whole graph ever being held as one string
+    global knowledge_graph, g_triples, dic_table, join_table, po_table, id_number
+    # The module stays imported across requests, so reset per-run state
+    knowledge_graph = []
+    g_triples = {}
+    dic_table = {}
+    join_table = {}
+    po_table = {}
+    id_number = 0
     # Resolve mapping.ttl relative to THIS file
     mapping_path = Path(__file__).resolve().parent.parent / "mapping.ttl"
     triples_map_list = mapping_parser(str(mapping_path))
     for triples_map in triples_map_list:
         semantify_json(triples_map, triples_map_list, "", source, triples_map.iterator)
-    return knowledge_graph
\ No newline at end of file
+        yield from knowledge_graph
+        knowledge_graph = []
+
+def kg_generation(source):
+    return "".join(kg_statements(source))
@@ -1,13 +1,16 @@
 try:
-    from in_memory_rdfizer.generator import kg_generation
+    from in_memory_rdfizer.generator import kg_statements
 except:
-    from .in_memory_rdfizer.generator import kg_generation
+    from .in_memory_rdfizer.generator import kg_statements
 
-from SPARQLWrapper import SPARQLWrapper, POST, DIGEST, JSON
+from concurrent.futures import ThreadPoolExecutor
 import os
 import socket
 
-global SPARQL_ENDPOINT , SPARQL_UPDATE_ENDPOINT
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPDigestAuth
+from urllib3.util.retry import Retry
 
 def _detect_host(service_name: str = "boxology_kg") -> str:
     env_host = os.getenv("SPARQL_HOST")
@@ -20,82 +23,227 @@ def _detect_host(service_name: str = "boxology_kg") -> str:
         return "localhost"
 
 _host = _detect_host()
-SPARQL_ENDPOINT = f"http://{_host}:8890/sparql"
-SPARQL_UPDATE_ENDPOINT = f"http://{_host}:8890/sparql-auth"
+SPARQL_ENDPOINT = os.getenv("SPARQL_QUERY_ENDPOINT", f"http://{_host}:8890/sparql")
+SPARQL_UPDATE_ENDPOINT = os.getenv("SPARQL_UPDATE_ENDPOINT", f"http://{_host}:8890/sparql-auth")
+# Named graph holding the boxologies; every query/update names it explicitly
+KG_GRAPH = "<" + os.getenv("KG_GRAPH_IRI", "http://tool4boxology.org/graph") + ">"
 print(f"[KG] Using Virtuoso host={_host}")
 
-def _get_query_sparql():
-    sparql = SPARQLWrapper(SPARQL_ENDPOINT, defaultGraph=SPARQL_ENDPOINT)
-    sparql.setReturnFormat(JSON)
-    return sparql
-
-
-def _get_update_sparql():
-    sparql = SPARQLWrapper(SPARQL_UPDATE_ENDPOINT, defaultGraph=SPARQL_ENDPOINT)
-    sparql.setReturnFormat(JSON)
-    sparql.setMethod(POST)           # <- update MUST be POST
-    sparql.setHTTPAuth(DIGEST)
-    sparql.setCredentials("dba", "dba")  # or your own user + password
-    return sparql
-
-def boxology_exists(source):
-	sparql = _get_query_sparql()
-	#sparql = SPARQLWrapper(SPARQL_ENDPOINT,defaultGraph=SPARQL_ENDPOINT)
-	for boxology in source["boxologies"]:
-		boxology_entity = "<http://tool4boxology.org/Boxology/" + boxology["id"] + ">"
-		query = "ASK WHERE { " + boxology_entity + " a <http://tool4boxology.org/Boxology> .}"
-		sparql.setReturnFormat(JSON)
-		sparql.setQuery(query)
-		results = sparql.query().convert()
-		print(results, "BOXOLOGY EXISTS?")
-		if results["boolean"] == True:
-			return True
-	return False
+# Set KG_GRAPH_PER_BOXOLOGY=1 to store each boxology in its own named graph
+# <KG_GRAPH_IRI/{id}> and replace it with a cheap DROP GRAPH; by default
+# everything lives in KG_GRAPH. Either way a re-ingest also removes the
+# boxology's triples from any other graph (older layouts), see README
+GRAPH_PER_BOXOLOGY = os.getenv("KG_GRAPH_PER_BOXOLOGY", "0") == "1"
+
+# Set KG_LEGACY_DELETE=1 to fall back to the explicit 19-pattern DELETE WHERE
+# (kept for comparing against the property-path delete)
+LEGACY_DELETE = os.getenv("KG_LEGACY_DELETE", "0") == "1"
+
+# Max triples per INSERT DATA; very large INSERTs slow down super-linearly
+INSERT_BATCH_SIZE = int(os.getenv("KG_INSERT_BATCH_SIZE", "5000"))
+
+# Set KG_DELETE_WORKERS > 1 to send the per-boxology DELETEs as concurrent
+# requests (then INSERT separately) instead of one combined update; this gives
+# up the single commit, so leave it at 0 for stores that dislike parallel writes
+DELETE_WORKERS = int(os.getenv("KG_DELETE_WORKERS", "0"))
+
+_BOXOLOGY_PREFIX = "<http://tool4boxology.org/Boxology/"
+
+# Every edge the mapping emits between a boxology and its patterns/components
+_BOXOLOGY_EDGES = ["<http://tool4boxology.org/" + p + ">" for p in (
+	"hasPattern", "hasInput", "hasOutput", "hasProcess",
+	"inputRoleParticipatesInProcess", "outputRoleParticipatesInProcess")]
+_BOXOLOGY_PATH = "(" + "|".join(_BOXOLOGY_EDGES) + ")*"
+
+# Seconds to wait for a SPARQL response; large uploads can take a while
+SPARQL_TIMEOUT = float(os.getenv("KG_SPARQL_TIMEOUT", "300"))
+
+# One pooled keep-alive session for every query/update (SPARQLWrapper's
+# urllib transport opened a new connection per request); failed connects are
+# retried with backoff
+SPARQL_POOL_SIZE = 16
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=SPARQL_POOL_SIZE, max_retries=Retry(total=3, backoff_factor=0.2)))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=SPARQL_POOL_SIZE, max_retries=Retry(total=3, backoff_factor=0.2)))
+_UPDATE_AUTH = HTTPDigestAuth("dba", "dba")  # or your own user + password
+
+def _sparql_query(query):
+	with _SESSION.get(SPARQL_ENDPOINT, params={"query": query}, headers={"Accept": "application/sparql-results+json"}, timeout=SPARQL_TIMEOUT) as response:
+		response.raise_for_status()
+		return response.json()
+
+def _sparql_update(update):
+	# Update MUST be POST; the raw application/sparql-update body skips form encoding
+	with _SESSION.post(SPARQL_UPDATE_ENDPOINT, data=update.encode("utf-8"), auth=_UPDATE_AUTH,
+			headers={"Content-Type": "application/sparql-update", "Accept": "application/json"},
+			timeout=SPARQL_TIMEOUT) as response:
+		response.raise_for_status()
+
+def _boxology_entities(source):
+	return [_BOXOLOGY_PREFIX + boxology["id"] + ">" for boxology in source["boxologies"]]
+
+def _boxology_graph(boxology_entity):
+	# <http://tool4boxology.org/Boxology/{id}> -> <{KG_GRAPH_IRI}/{id}>
+	return KG_GRAPH[:-1] + "/" + boxology_entity[len(_BOXOLOGY_PREFIX):]
+
+def any_boxology_exists(source):
+	values_clause = " ".join(_boxology_entities(source))
+	if not values_clause:
+		return False
+	# One ASK for all boxologies instead of one per boxology: true as soon as
+	# any of them is already stored, in whichever graph it was stored
+	results = _sparql_query("ASK { VALUES ?b { " + values_clause + " } GRAPH ?g { ?b a <http://tool4boxology.org/Boxology> . } }")
+	print(results, "BOXOLOGY EXISTS?")
+	return bool(results.get("boolean"))
+
+# Kept under its old name for existing callers
+boxology_exists = any_boxology_exists
+
+def _insert_data_query(statements, graph):
+	return "INSERT DATA { GRAPH " + graph + " { " + "".join(statements) + "} }"
+
+def _partition_by_boxology(statements):
+	# Group statements by the boxology whose pattern/component edges reach
+	# their subject (the same walk _delete_boxology_query does); anything not
+	# reachable from a boxology stays in KG_GRAPH
+	by_subject = {}
+	edges = {}
+	for statement in statements:
+		subject, predicate, obj = statement.split(" ", 2)
+		by_subject.setdefault(subject, []).append(statement)
+		if predicate in _BOXOLOGY_EDGES:
+			edges.setdefault(subject, []).append(obj.rstrip()[:-1])  # drop the trailing "."
+	graphs = {}
+	claimed = set()
+	for root in [subject for subject in by_subject if subject.startswith(_BOXOLOGY_PREFIX)]:
+		reached = {root: None}
+		stack = [root]
+		while stack:
+			for node in edges.get(stack.pop(), ()):
+				if node not in reached:
+					reached[node] = None
+					stack.append(node)
+		graphs[_boxology_graph(root)] = [statement for node in reached for statement in by_subject.get(node, ())]
+		claimed.update(reached)
+	rest = [statement for subject, group in by_subject.items() if subject not in claimed for statement in group]
+	if rest:
+		graphs.setdefault(KG_GRAPH, []).extend(rest)
+	return graphs
+
+def _insert_data_queries(triples):
+	# triples is either the generated N-Triples text or an iterable of its
+	# "s p o.\n" statements (kg_statements); one statement per line, with
+	# newlines inside literals escaped, so batches are cut on line boundaries
+	if isinstance(triples, str):
+		triples = triples.splitlines(keepends=True)
+	if GRAPH_PER_BOXOLOGY:
+		groups = _partition_by_boxology(triples).items()
+	else:
+		groups = [(KG_GRAPH, triples)]
+	for graph, statements in groups:
+		batch = []
+		for statement in statements:
+			batch.append(statement)
+			if len(batch) == INSERT_BATCH_SIZE:
+				yield _insert_data_query(batch, graph)
+				batch = []
+		if batch:
+			yield _insert_data_query(batch, graph)
 
 def insert_triples(triples):
-	sparql = _get_update_sparql()
-	#sparql = SPARQLWrapper(SPARQL_ENDPOINT,defaultGraph=SPARQL_ENDPOINT)
-	query = "INSERT DATA { " + triples + "}"
-	sparql.setReturnFormat(JSON)
-	sparql.setQuery(query)
-	results = sparql.query().convert()
-
-def update_kg(source,triples):
-	sparql = _get_update_sparql()
-	#sparql = SPARQLWrapper(SPARQL_ENDPOINT,defaultGraph=SPARQL_ENDPOINT)
-	for boxology in source["boxologies"]:
-		boxology_entity = "<http://tool4boxology.org/Boxology/" + boxology["id"] + ">"
-		query = "DELETE WHERE {" 
-		query += boxology_entity + " a <http://tool4boxology.org/Boxology> .\n"
-		query += boxology_entity + " <http://www.w3.org/2000/01/rdf-schema#label> ?boxology_label .\n"
-		query += boxology_entity + " <http://tool4boxology.org/hasPattern> ?design_pattern .\n"
-		query += "?design_pattern a <http://tool4boxology.org/DesignPattern> .\n"
-		query += "?design_pattern <http://www.w3.org/2000/01/rdf-schema#label> ?pattern_label .\n"
-		query += "?design_pattern <http://tool4boxology.org/hasInput> ?input_component .\n"
-		query += "?design_pattern <http://tool4boxology.org/hasOutput> ?output_component .\n"
-		query += "?design_pattern <http://tool4boxology.org/hasProcess> ?process_component .\n"
-		query += "?input_component a <http://tool4boxology.org/Component> .\n"
-		query += "?input_component <http://www.w3.org/2000/01/rdf-schema#label> ?input_component_label .\n"
-		query += "?input_component <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> ?input_component_type .\n"
-		query += "?process_component a <http://tool4boxology.org/Component> .\n"
-		query += "?process_component <http://www.w3.org/2000/01/rdf-schema#label> ?process_component_label .\n"
-		query += "?process_component <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> ?process_component_type .\n"
-		query += "?output_component a <http://tool4boxology.org/Component> .\n"
-		query += "?output_component <http://www.w3.org/2000/01/rdf-schema#label> ?output_component_label .\n"
-		query += "?output_component <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> ?output_component_type .\n"
-		query += "?input_component <http://tool4boxology.org/inputRoleParticipatesInProcess> ?process_component .\n"
-		query += "?process_component <http://tool4boxology.org/outputRoleParticipatesInProcess> ?output_component .\n"
-		query += "}"
-		sparql.setReturnFormat(JSON)
-		sparql.setQuery(query)
-		results = sparql.query().convert()
+	for query in _insert_data_queries(triples):
+		_sparql_update(query)
+
+def _delete_boxology_query(boxology_entity):
+	if LEGACY_DELETE:
+		query = _legacy_delete_boxology_query(boxology_entity)
+	else:
+		# Walk from the boxology through its pattern/component edges (zero or
+		# more hops, so the boxology itself is included) and drop every triple
+		# of each node reached, instead of joining 19 patterns that must all
+		# match. It runs over every graph, so copies left in KG_GRAPH or the
+		# old endpoint-URL default graph go too
+		query = _PATH_DELETE_HEAD + boxology_entity + _PATH_DELETE_TAIL
+	if GRAPH_PER_BOXOLOGY:
+		# The boxology's own graph holds exactly its triples: drop it
+		# wholesale, after which the walk only finds older copies (if any)
+		return "DROP SILENT GRAPH " + _boxology_graph(boxology_entity) + " ;\n" + query
+	return query
+
+# Everything in the delete queries that doesn't mention the boxology itself,
+# built once at import instead of re-concatenated for every boxology
+_PATH_DELETE_HEAD = "DELETE { GRAPH ?g { ?s ?p ?o } } WHERE { GRAPH ?g { "
+_PATH_DELETE_TAIL = " " + _BOXOLOGY_PATH + " ?s . ?s ?p ?o } }"
+_LEGACY_DELETE_HEAD = "DELETE WHERE { GRAPH ?g {"
+_LEGACY_DELETE_REST = (
+	"?design_pattern a <http://tool4boxology.org/DesignPattern> .\n"
+	"?design_pattern <http://www.w3.org/2000/01/rdf-schema#label> ?pattern_label .\n"
+	"?design_pattern <http://tool4boxology.org/hasInput> ?input_component .\n"
+	"?design_pattern <http://tool4boxology.org/hasOutput> ?output_component .\n"
+	"?design_pattern <http://tool4boxology.org/hasProcess> ?process_component .\n"
+	"?input_component a <http://tool4boxology.org/Component> .\n"
+	"?input_component <http://www.w3.org/2000/01/rdf-schema#label> ?input_component_label .\n"
+	"?input_component <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> ?input_component_type .\n"
+	"?process_component a <http://tool4boxology.org/Component> .\n"
+	"?process_component <http://www.w3.org/2000/01/rdf-schema#label> ?process_component_label .\n"
+	"?process_component <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> ?process_component_type .\n"
+	"?output_component a <http://tool4boxology.org/Component> .\n"
+	"?output_component <http://www.w3.org/2000/01/rdf-schema#label> ?output_component_label .\n"
+	"?output_component <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> ?output_component_type .\n"
+	"?input_component <http://tool4boxology.org/inputRoleParticipatesInProcess> ?process_component .\n"
+	"?process_component <http://tool4boxology.org/outputRoleParticipatesInProcess> ?output_component .\n"
+	"} }"
+)
+
+def _legacy_delete_boxology_query(boxology_entity):
+	return (_LEGACY_DELETE_HEAD
+		+ boxology_entity + " a <http://tool4boxology.org/Boxology> .\n"
+		+ boxology_entity + " <http://www.w3.org/2000/01/rdf-schema#label> ?boxology_label .\n"
+		+ boxology_entity + " <http://tool4boxology.org/hasPattern> ?design_pattern .\n"
+		+ _LEGACY_DELETE_REST)
+
+def _update_kg_query(source, triples):
+	# All DELETEs and the (batched) INSERTs go out as one ;-separated SPARQL
+	# UPDATE request, so the store parses and commits them together
+	updates = [_delete_boxology_query(boxology_entity) for boxology_entity in _boxology_entities(source)]
+	updates.extend(_insert_data_queries(triples))
+	return " ;\n".join(updates)
+
+def _delete_boxology(boxology_entity):
+	_sparql_update(_delete_boxology_query(boxology_entity))
+
+def _update_kg_concurrent(source, triples):
+	boxology_entities = _boxology_entities(source)
+	# Workers share the pooled session, one connection each
+	with ThreadPoolExecutor(max_workers=DELETE_WORKERS) as executor:
+		list(executor.map(_delete_boxology, boxology_entities))
 	insert_triples(triples)
 
+def upsert(source, triples):
+	# Replace-or-insert in one request: dropping a boxology that isn't
+	# stored yet is a no-op, so new and re-loaded sources take the same path
+	if DELETE_WORKERS > 1:
+		return _update_kg_concurrent(source, triples)
+	query = _update_kg_query(source, triples)
+	if not query:
+		return
+	_sparql_update(query)
+
+# Kept under its old name for existing callers
+update_kg = upsert
+
 def create_kg(source):
-	knowledge_graph = kg_generation(source)
-	update_needed = boxology_exists(source)
-	if update_needed:
-		update_kg(source,knowledge_graph)
-	else:
-		insert_triples(knowledge_graph)
+	# Statements are batched straight into the INSERTs as they are generated
+	knowledge_graph = kg_statements(source)
+	# No any_boxology_exists() round trip up front: upsert covers both cases
+	upsert(source, knowledge_graph)
 
+def create_kgs(sources, workers=8):
+	# The rdfizer keeps per-run state in module globals, so sources are
+	# generated one at a time here; each finished graph is uploaded from the
+	# pool while the next one is generated. Sources should not share boxology ids
+	workers = max(1, min(workers, SPARQL_POOL_SIZE))  # one pooled connection per worker
+	with ThreadPoolExecutor(max_workers=workers) as executor:
+		futures = [executor.submit(upsert, source, list(kg_statements(source))) for source in sources]
+		for future in futures:
+			future.result()